@@ -0,0 +1,186 @@
+# Description: Batch ray simulation for 'Black Box' using NumPy. Computes the ray results of every entry square for
+#               many atom layouts at once, for balancing and analysis. Requires numpy.
+
+import numpy as np
+from Board import ENTRY_SQUARES, MAX_RAY_STEPS
+
+# exit code of a ray that hits an atom. Any other exit code is the index in ENTRY_SQUARES of the exit square (the
+# entry square's own index for a reflection).
+HIT = -1
+
+# number of layouts simulated together. Keeps the working arrays to a few hundred megabytes.
+CHUNK_SIZE = 65536
+
+# events on a square of a line: an atom on the square, an atom beside it on the following or preceding line, or the
+# border
+_HIT, _AFTER_SIDE, _BEFORE_SIDE, _EXIT = 1, 2, 4, 8
+_SIDES = _AFTER_SIDE | _BEFORE_SIDE
+
+# squares 0 and 9 of every line are on the border
+_BORDER_BITS = 1 | 1 << 9
+
+# size of each half of the next set bit lookup table (10-bit masks by 10 positions)
+_TABLE_SIZE = 1024 * 10
+
+# starting line, position and step of a ray shot from each entry square, in ENTRY_SQUARES order. Rays from the left
+# and right borders travel along a row, rays from the top and bottom along a column.
+_START_LINE = np.array([row if column in (0, 9) else 10 + column for row, column in ENTRY_SQUARES], dtype=np.int32)
+_START_POSITION = np.array([column if column in (0, 9) else row for row, column in ENTRY_SQUARES], dtype=np.int32)
+_START_STEP = np.array([1 if position == 0 else -1 for position in _START_POSITION], dtype=np.int32)
+_START_TABLE = (_START_STEP < 0) * _TABLE_SIZE + _START_POSITION
+_ENTRY = np.arange(len(ENTRY_SQUARES), dtype=np.int8)
+
+# index in ENTRY_SQUARES of the border square at each position of each line (HIT where there is none)
+_LINE_ENTRY_INDEX = np.full(200, HIT, dtype=np.int8)
+for _index, (_row, _column) in enumerate(ENTRY_SQUARES):
+    _LINE_ENTRY_INDEX[_row * 10 + _column] = _index
+    _LINE_ENTRY_INDEX[(10 + _column) * 10 + _row] = _index
+
+
+def random_layouts(count, atoms=5, seed=None):
+    """Accepts as parameters the number of layouts, the number of atoms per layout and an optional random seed.
+    Returns a (count, atoms, 2) array of atom rows and columns, each layout drawn uniformly without repeated squares
+    from the 8 x 8 black box."""
+
+    rng = np.random.default_rng(seed)
+    squares = rng.random((count, 64)).argsort(axis=1)[:, :atoms]
+    return np.stack((squares // 8 + 1, squares % 8 + 1), axis=2)
+
+
+def simulate_layouts(atom_positions, chunk_size=CHUNK_SIZE):
+    """Accepts as a parameter an (N, atoms, 2) array of atom rows and columns, one layout per row. Returns an
+    (N, 32) int8 array with the exit code of a ray shot from each entry square, in ENTRY_SQUARES order. Gives the
+    same results as GameBoard.get_ray_table."""
+
+    positions = np.asarray(atom_positions, dtype=np.intp)
+    if positions.ndim != 3 or positions.shape[2] != 2:
+        raise ValueError('atom_positions must have shape (N, atoms, 2)')
+
+    codes = np.empty((positions.shape[0], len(ENTRY_SQUARES)), dtype=np.int8)
+    for first in range(0, positions.shape[0], chunk_size):
+        codes[first:first + chunk_size] = _simulate_chunk(positions[first:first + chunk_size])
+    return codes
+
+
+def signature_keys(codes, entry_map=_ENTRY):
+    """Accepts as parameters an (N, 32) array of exit codes from simulate_layouts and an optional array giving the
+    new index of each entry square (a symmetry of the board). Returns an (N, 4) uint64 array with the signature of
+    each layout, relabelled by entry_map, packed into one key: eight exit codes (plus one, so a hit is 0) per word,
+    first entry in the highest byte. Keys compare (see keys_less) in the same order as the signatures."""
+
+    lookup = np.append(np.asarray(entry_map) + 1, 0).astype(np.uint64)      # code -1 (hit) is the last item
+    moved = np.empty(codes.shape, dtype=np.uint64)
+    moved[:, entry_map] = lookup[codes]
+    shifts = np.arange(56, -8, -8, dtype=np.uint64)
+    return (moved.reshape(len(codes), 4, 8) << shifts).sum(axis=2, dtype=np.uint64)
+
+
+def keys_less(keys, other):
+    """Accepts as parameters two (N, 4) key arrays from signature_keys. Returns a boolean array of the rows where
+    keys is smaller than other."""
+
+    less = np.zeros(len(keys), dtype=bool)
+    equal = np.ones(len(keys), dtype=bool)
+    for word in range(0, keys.shape[1]):
+        less |= equal & (keys[:, word] < other[:, word])
+        equal &= keys[:, word] == other[:, word]
+    return less
+
+
+def _simulate_chunk(positions):
+    """Accepts as a parameter an (N, atoms, 2) array of atom positions. Advances the rays of all N layouts in
+    lock-step, dropping each ray once it has a result. Returns the (N, 32) array of exit codes."""
+
+    count = positions.shape[0]
+    rays_per_layout = len(ENTRY_SQUARES)
+
+    # Every row and column of a layout is a line of 10 squares: lines 0 to 9 are the rows and lines 10 to 19 the
+    # columns. A ray is kept as its line (layout * 20 + line), the square it is on and its step (+1 or -1) along the
+    # line. Rays only stop on squares with an atom in or beside them, so each loop handles one detour or reflection.
+    atoms = np.zeros((count, 10, 10), dtype=bool)
+    atoms[np.arange(count)[:, None], positions[..., 0], positions[..., 1]] = True
+    events, masks = _line_events(atoms)
+    events = events.ravel()
+    masks = masks.ravel()
+
+    # first step of every ray, from its entry square. An atom beside the first square is an edge case reflection.
+    line = (np.arange(count, dtype=np.int32) * 20)[:, None] + _START_LINE
+    stop = _NEXT_BIT[masks[line] * 10 + _START_TABLE]
+    event = events[line * 10 + stop]
+    edge = (event & _SIDES != 0) & (stop == _START_POSITION + _START_STEP)
+    exiting = event == _EXIT
+    codes = np.where(exiting, _LINE_ENTRY_INDEX[_START_LINE * 10 + stop], np.where(edge, _ENTRY, HIT)).ravel()
+    finished = (exiting | edge | (event & _HIT != 0)).ravel()
+
+    ray = np.flatnonzero(~finished)
+    line = line.ravel()[ray]
+    event = event.ravel()[ray]
+    step_sign = _START_STEP[ray % rays_per_layout]
+    square = stop.ravel()[ray] - step_sign
+
+    for step in range(MAX_RAY_STEPS):
+        # rays still in play were detoured or reflected on the square before the stop. A reflection reverses along
+        # the same line, a detour turns onto the crossing line away from the atom.
+        reflect = event & _SIDES == _SIDES
+        local = line % 20
+        crossing = line - local + (local < 10) * 10 + square
+        line = np.where(reflect, line, crossing)
+        position = np.where(reflect, square, local % 10)
+        step_sign = np.where(reflect, -step_sign, np.where(event & _AFTER_SIDE, -1, 1))
+
+        # jump to the next square on the line with an atom in or beside it, or to the border
+        stop = _NEXT_BIT[(step_sign < 0) * _TABLE_SIZE + masks[line] * 10 + position]
+        event = events[line * 10 + stop]
+        exiting = event == _EXIT
+        finished = exiting | (event & _HIT != 0)
+        codes[ray[finished]] = np.where(exiting, _LINE_ENTRY_INDEX[line % 20 * 10 + stop], HIT)[finished]
+
+        keep = np.flatnonzero(~finished)
+        if keep.size == 0:
+            break
+        ray = ray[keep]
+        line = line[keep]
+        event = event[keep]
+        step_sign = step_sign[keep]
+        square = stop[keep] - step_sign
+
+    else:
+        raise RuntimeError(str(keep.size) + ' rays did not finish')
+
+    return codes.reshape(count, rays_per_layout)
+
+
+def _line_events(atoms):
+    """Accepts as a parameter an (N, 10, 10) boolean array of atom squares. Returns an (N, 20, 10) int8 array with
+    the event for each square of each line (_EXIT, _HIT, or the _AFTER_SIDE and _BEFORE_SIDE bits for atoms beside
+    it on the neighbouring lines), and an (N, 20) array of 10-bit masks of the squares on each line with an event."""
+
+    lines = np.zeros((atoms.shape[0], 2, 12, 10), dtype=np.int8)
+    lines[:, 0, 1:11] = atoms
+    lines[:, 1, 1:11] = atoms.transpose(0, 2, 1)
+
+    events = lines[:, :, 1:11] | lines[:, :, 2:] << 1 | lines[:, :, :-2] << 2     # _HIT, _AFTER_SIDE, _BEFORE_SIDE
+    events = events.reshape(atoms.shape[0], 20, 10)
+    events[:, :, 0] = _EXIT
+    events[:, :, 9] = _EXIT
+
+    masks = np.full(events.shape[:2], _BORDER_BITS, dtype=np.int32)
+    for position in range(1, 9):
+        masks |= (events[:, :, position] != 0).astype(np.int32) << position
+    return events, masks
+
+
+def _next_bit_table():
+    """Returns a lookup table indexed by mask * 10 + position for every 10-bit mask. The first half holds the first
+    set bit after the position and the second half the last set bit before it (9 or 0 if there is none)."""
+
+    table = np.empty(2 * _TABLE_SIZE, dtype=np.int32)
+    for mask in range(0, 1024):
+        for position in range(0, 10):
+            table[mask * 10 + position] = next((bit for bit in range(position + 1, 10) if mask >> bit & 1), 9)
+            table[_TABLE_SIZE + mask * 10 + position] = next(
+                (bit for bit in range(position - 1, -1, -1) if mask >> bit & 1), 0)
+    return table
+
+
+_NEXT_BIT = _next_bit_table()
@@ -0,0 +1,278 @@
+# Description: Benchmark suite for 'Black Box'. Times ray tracing, shooting, scoring, whole games and screen updates on
+#               fixed layouts, writes the results as JSON and compares them with a saved baseline. Run
+#               'python Benchmarks.py --help' for the options.
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+from random import Random
+from statistics import median
+from Board import GameBoard, ENTRY_SQUARES, interior_squares
+from BlackBoxEngine import BlackBoxEngine, random_atom_list
+from SelfPlay import RandomStrategy, play_game
+from Solver import LayoutSolver
+
+# baseline file compared against by default, next to this file
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# a benchmark slower than its baseline by more than this fraction, relative to the calibration workload, in two sets
+# of runs, is reported as a regression
+TOLERANCE = 0.3
+
+# name of the calibration workload in the timing runs (see calibration_workload)
+CALIBRATION = 'calibration'
+
+# timing runs per benchmark in each round. The median run is kept.
+REPEAT = 9
+
+# longest time allowed for nine in ten LayoutSolver.best_ray calls, in seconds, and number of games they are timed in
+HINT_LIMIT = 0.1
+HINT_GAMES = 8
+
+# fixed layouts to time. Random layouts from seeds 0 to 9, the layouts with the longest total ray path out of the
+# first 20000 seeds (many detours), and layouts with ten, eight and eight edge case reflections.
+LAYOUTS = {
+    'random': [random_atom_list(seed) for seed in range(0, 10)],
+    'deflection': [[(5, 1), (6, 2), (7, 1), (7, 2), (8, 3)], [(1, 6), (2, 5), (2, 6), (3, 6), (3, 7)],
+                   [(1, 8), (2, 7), (3, 6), (3, 7), (4, 6)]],
+    'edge_reflection': [[(1, 2), (1, 7), (1, 8), (2, 8), (8, 8)], [(4, 1), (5, 1), (7, 1), (8, 2), (8, 4)],
+                        [(1, 2), (1, 5), (2, 1), (2, 6), (2, 8)]],
+}
+
+
+def trace_layouts(layouts):
+    """Accepts as a parameter a list of atom layouts. Returns a function that traces a ray from every entry square
+    of each layout on a new GameBoard, so nothing is cached between runs."""
+
+    def run():
+        for layout in layouts:
+            board = GameBoard(layout)
+            for row, column in ENTRY_SQUARES:
+                board.trace_ray(row, column)
+    return run
+
+
+def shoot_layouts(layouts):
+    """Accepts as a parameter a list of atom layouts. Returns a function that creates a game for each layout and
+    shoots a ray from every entry square, as a player would."""
+
+    def run():
+        for layout in layouts:
+            game = BlackBoxEngine(layout)
+            for row, column in ENTRY_SQUARES:
+                game.shoot_ray(row, column)
+    return run
+
+
+def guess_long_game():
+    """Returns a function that plays a long game of atom guesses: every square inside the black box is guessed
+    twice, in a fixed shuffled order, so there are wrong, correct and repeated guesses."""
+
+    squares = interior_squares() * 2
+    Random(0).shuffle(squares)
+    layout = LAYOUTS['random'][0]
+
+    def run():
+        game = BlackBoxEngine(layout)
+        for row, column in squares:
+            game.guess_atom(row, column)
+    return run
+
+
+def full_games():
+    """Returns a function that plays 20 whole games with RandomStrategy on seeds 0 to 19."""
+
+    def run():
+        for seed in range(0, 20):
+            play_game(RandomStrategy, seed)
+    return run
+
+
+def screen_frames(redraw):
+    """Accepts as a parameter whether to redraw the whole screen. Returns a function that calls update_screen on a
+    game with some rays and guesses played, under the SDL dummy video driver, or None if pygame is not installed."""
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    try:
+        import pygame
+        from BlackBoxGUI import BlackBoxGame
+    except ImportError:
+        return None
+
+    pygame.init()
+    game = BlackBoxGame(LAYOUTS['random'][0])
+    for row, column in ENTRY_SQUARES[::3]:
+        game.shoot_ray(row, column)
+    for row, column in interior_squares()[::7]:
+        game.guess_atom(row, column)
+    game.update_screen()
+
+    def run():
+        if redraw:
+            game._full_redraw = True
+        game.update_screen()
+    return run
+
+
+def best_ray_latency(games=HINT_GAMES):
+    """Accepts as an optional parameter a number of games. Plays each game on a random layout with a new
+    LayoutSolver, asking best_ray for the next ray before every shot, as a player asking for a hint would, until the
+    layout is known. Returns a sorted list of the seconds taken by each best_ray call."""
+
+    times = []
+    for seed in range(0, games):
+        table = GameBoard(random_atom_list(seed)).get_ray_table()
+        solver = LayoutSolver()
+        while True:
+            start = timeit.default_timer()
+            entry = solver.best_ray()
+            times.append(timeit.default_timer() - start)
+            if entry is None:
+                break
+            solver.add_ray(entry, table[entry].exit)
+    return sorted(times)
+
+
+def calibration_workload():
+    """Runs a fixed amount of plain Python work (integer arithmetic, dictionary updates and lookups, and function
+    calls) that does not use the game code. Benchmarks are timed relative to it, so the baseline does not depend on
+    the speed of the machine it was recorded on. Returns the result of the work."""
+
+    table = {}
+    total = 0
+    for index in range(0, 20000):
+        table[index % 997] = index
+        total += abs(table.get(index // 3, 0) - index) & 255
+    return total
+
+
+# benchmarks by name. Each entry makes the function to time.
+BENCHMARKS = {
+    'trace_ray_random': lambda: trace_layouts(LAYOUTS['random']),
+    'trace_ray_deflection': lambda: trace_layouts(LAYOUTS['deflection']),
+    'trace_ray_edge_reflection': lambda: trace_layouts(LAYOUTS['edge_reflection']),
+    'shoot_ray_random': lambda: shoot_layouts(LAYOUTS['random']),
+    'shoot_ray_deflection': lambda: shoot_layouts(LAYOUTS['deflection']),
+    'shoot_ray_edge_reflection': lambda: shoot_layouts(LAYOUTS['edge_reflection']),
+    'guess_atom_long_game': guess_long_game,
+    'full_game_random': full_games,
+    'update_screen_idle': lambda: screen_frames(False),
+    'update_screen_redraw': lambda: screen_frames(True),
+}
+
+
+def run_benchmarks(names=None, repeat=REPEAT):
+    """Accepts as optional parameters a list of benchmark names (default: all) and the number of timing runs.
+    Returns a dictionary of results ready to be written as JSON: the Python version and platform, the median seconds
+    of the calibration workload, and for each benchmark the median seconds per call, the median time relative to the
+    calibration workload and number of calls per run. Each benchmark makes enough calls per run to take at least 0.2
+    seconds. The runs are taken in rounds of one run of every benchmark and of the calibration workload, so a burst of
+    load on the machine slows down one round rather than every run of one benchmark. A benchmark's relative time is
+    the median over the rounds of its time divided by the calibration time of the same round, so it does not change
+    with the speed of the machine. Benchmarks that cannot run here (such as screen updates without pygame) are left
+    out."""
+
+    timers = {}
+    for name in [CALIBRATION] + list(names or BENCHMARKS):
+        if name == CALIBRATION:
+            function = calibration_workload
+        elif name in BENCHMARKS:
+            function = BENCHMARKS[name]()
+        else:
+            raise ValueError('Unknown benchmark ' + repr(name) + '. Use one of ' + ', '.join(BENCHMARKS))
+        if function is not None:
+            timer = timeit.Timer(function)
+            number, elapsed = timer.autorange()
+            timers[name] = (timer, number, [elapsed / number])
+
+    for run in range(1, repeat):
+        for timer, number, times in timers.values():
+            times.append(timer.timeit(number) / number)
+
+    calibration_times = timers.pop(CALIBRATION)[2]
+    results = {'python': platform.python_version(), 'platform': platform.platform(),
+               'calibration_seconds': median(calibration_times), 'benchmarks': {}}
+    for name, (timer, number, times) in timers.items():
+        relative = median(time / calibration for time, calibration in zip(times, calibration_times))
+        results['benchmarks'][name] = {'seconds': median(times), 'relative': relative, 'number': number}
+    return results
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Accepts as parameters the results of run_benchmarks, a baseline in the same format and the allowed slowdown
+    as a fraction. Returns a dictionary mapping each benchmark in both to its relative time divided by the baseline
+    relative time, a sorted list of the benchmarks slower than the baseline by more than the tolerance, and a sorted
+    list of the benchmarks that have no baseline entry."""
+
+    ratios = {}
+    for name, result in results['benchmarks'].items():
+        if name in baseline['benchmarks']:
+            ratios[name] = result['relative'] / baseline['benchmarks'][name]['relative']
+    regressions = sorted(name for name, ratio in ratios.items() if ratio > 1 + tolerance)
+    missing = sorted(name for name in results['benchmarks'] if name not in baseline['benchmarks'])
+    return ratios, regressions, missing
+
+
+def main(argv=None):
+    """Reads the command line options, runs the benchmarks, writes the results and compares their times relative to
+    the calibration workload with the baseline. Benchmarks that look slower than the tolerance are run again, and
+    only those slower in both rounds are reported as regressions, so a burst of load on the machine is not. When
+    every benchmark is run, also checks that nine in ten best_ray calls take less than HINT_LIMIT seconds. Exits with
+    status 1 if there are regressions, benchmarks missing from the baseline, or the best_ray check fails."""
+
+    parser = argparse.ArgumentParser(description='Time the Black Box hot paths and compare with a baseline.')
+    parser.add_argument('names', nargs='*', help='benchmarks to run (default: all): ' + ', '.join(BENCHMARKS))
+    parser.add_argument('--repeat', type=int, default=REPEAT, help='timing runs per benchmark (median is kept)')
+    parser.add_argument('--output', help='file to write the JSON results to (default: standard output)')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='baseline JSON file to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='allowed slowdown against the baseline as a fraction (default: 0.3)')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.names, args.repeat)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+
+    slow_hints = False
+    if not args.names:
+        times = best_ray_latency()
+        p90 = times[len(times) * 9 // 10]
+        slow_hints = p90 > HINT_LIMIT
+        sys.stderr.write('{:<28} {:6.3f}s p90, {:.3f}s max{}\n'.format('best_ray_latency', p90, times[-1],
+                                                                      '  TOO SLOW' if slow_hints else ''))
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as output:
+            output.write(text + '\n')
+        return 1 if slow_hints else 0
+
+    if not os.path.exists(args.baseline):
+        sys.stderr.write('No baseline at ' + args.baseline + '; run with --save-baseline to create one\n')
+        return 1 if slow_hints else 0
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    ratios, regressions, missing = compare(results, baseline, args.tolerance)
+    if regressions:
+        again, confirmed, _ = compare(run_benchmarks(regressions, args.repeat), baseline, args.tolerance)
+        for name in regressions:
+            ratios[name] = min(ratios[name], again[name])           # the round closer to the baseline
+        regressions = confirmed
+    for name, ratio in ratios.items():
+        flag = '  REGRESSION' if name in regressions else ''
+        sys.stderr.write('{:<28} {:6.2f}x baseline{}\n'.format(name, ratio, flag))
+    for name in missing:
+        sys.stderr.write('{:<28} not in the baseline; run with --save-baseline to add it\n'.format(name))
+    return 1 if regressions or missing or slow_hints else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+# Description: Headless game logic for 'Black Box'. Contains no pygame code so games can be created, played and
+#               scored without a display.
+
+from random import sample, Random
+from Board import GameBoard, BitBoard, BOARD_SIZE, ATOM_COUNT, interior_squares
+
+# points a player starts the game with
+STARTING_SCORE = 25
+
+def random_atom_list(seed=None, size=BOARD_SIZE, atom_count=ATOM_COUNT):
+    """Accepts as optional parameters a random seed, the number of rows and columns inside the 'black box' and the
+    number of atoms. Returns a list of random atom locations inside the 'black box'. Uses the random module's shared
+    generator if no seed is given."""
+
+    squares = interior_squares(size)
+    if seed is None:
+        return sample(squares, k=atom_count)
+    return Random(seed).sample(squares, k=atom_count)
+
+
+class BlackBoxEngine:
+    """Implementation of the Black Box game logic. Contains method to create a GameBoard instance with indicated atom
+    placement. Contains methods to shoot rays, adjust the game score, guess atom locations, get the current score,
+    and get how many atoms are left to guess. Does not draw anything; see BlackBoxGame for the pygame interface."""
+
+    def __init__(self, atom_list=None, compact=False, seed=None, size=BOARD_SIZE, atom_count=ATOM_COUNT, log=None,
+                 instrumentation=None):
+        """Accepts as an optional parameter a list of tuples designating atom positions. If no list is given,
+        atom_count atoms are randomly placed within the 'black box', using the optional seed so the same seed always
+        gives the same layout. The 'black box' has size rows and columns (8 by default) inside a border of entry
+        squares. If compact is True, the game board is stored as a BitBoard. If a log (such as a
+        GameLog.GameLogWriter) is given, the layout and every move are recorded to it. If an instrumentation (such as
+        an Instrumentation.Instrumentation) is given, every ray shot is traced, timed and counted by it. Initializes
+        the game board, score and guess lists."""
+
+        if atom_list is None:
+            atom_list = random_atom_list(seed, size, atom_count)    # initialize random list of atom locations
+        atom_list = list(atom_list)
+        self._size = size
+        if compact:
+            self._gameB = BitBoard(atom_list, size)     # initialize a compact game board with the atom list
+        else:
+            self._gameB = GameBoard(atom_list, size)    # initialize a game board with the atom list
+        self._atoms = set(atom_list)                    # set of atom squares that haven't been guessed
+        self._score = STARTING_SCORE                    # initialize the starting points for the game
+        self._ray_locations = {}                        # used ray entry/exit squares, mapped to their ray color
+        self._ray_pairs = {}                            # (entry, exit) squares of each ray, by ray color
+        self._wrong_atom_guesses = set()                # set of incorrect atom guesses
+        self._correct_atom_guesses = set()              # set of correct atom guesses
+        self._ray_color = None
+        self._log = log
+        if log is not None:
+            log.start(size, atom_list)                  # record the layout before any move
+
+        # only instrumented games replace shoot_ray with the instrumented version, so other games pay nothing
+        self._instrumentation = instrumentation
+        if instrumentation is not None:
+            self._layout = tuple(sorted(atom_list))
+            self.shoot_ray = self._instrumented_shoot_ray
+
+    def shoot_ray(self, row, column):
+        """Accepts as parameters a row and column that designates the entry point of a ray. Simulates the ray path
+        with appropriate hit, detours and/or reflections. Returns 'False' if the entry row and column are not legal
+        plays (non-corner border squares). Returns 'None' if the play is a hit. Returns a tuple of exit square row and
+        column if the play exits the game black box. Deducts from the player's score: 1 point for ray entry and 1 point
+        for ray exit, if the squares have not already been used. Each ray gets the next color number, and its entry
+        and exit squares are recorded as a pair under that number and in the game log, if there is one."""
+
+        if not self._is_entry_square(row, column):
+            return False
+
+        result = self._gameB.get_ray_result(row, column)                # look up the ray path for this layout
+        return self.play_ray(row, column, result.exit)
+
+    def _instrumented_shoot_ray(self, row, column):
+        """Accepts as parameters a row and column that designates the entry point of a ray. Shoots the ray like
+        shoot_ray, but has the instrumentation trace it (see Instrumentation.record_shot) instead of looking up the
+        cached result, so every shot is traced once and its statistics and time are those of the trace. Returns what
+        shoot_ray returns."""
+
+        if not self._is_entry_square(row, column):
+            return False
+
+        result = self._instrumentation.record_shot(self._layout, (row, column), self._gameB)
+        return self.play_ray(row, column, result.exit)
+
+    def _is_entry_square(self, row, column):
+        """Accepts as parameters a row and column. Returns True if they designate a legal ray entry square (a
+        non-corner border square), otherwise False."""
+
+        last = self._size + 1
+
+        # check if ray is being shot from off the board
+        if not (0 <= row <= last and 0 <= column <= last):
+            return False
+
+        # check if ray is being shot from corner square
+        if (row == 0 or row == last) and (column == 0 or column == last):
+            return False
+
+        # check if ray is being shot from non-border square
+        if 0 < row < last and 0 < column < last:
+            return False
+        return True
+
+    def play_ray(self, row, column, exit_square):
+        """Accepts as parameters the row and column of a legal entry square and the result of a ray shot from it: the
+        exit square, or None for a hit. Scores and records the ray the same way as shoot_ray, without tracing it.
+        Used by shoot_ray, and to rebuild a game from a log. Returns exit_square."""
+
+        score = self._score
+
+        if self._ray_color is None:
+            self._ray_color = 0
+        else:
+            self._ray_color += 1
+
+        self.adjust_score(row, column, self._ray_color)                 # adjust score for entry ray position
+        self._ray_pairs[self._ray_color] = ((row, column), exit_square)
+
+        if exit_square is not None:                                     # if ray does not hit an atom
+            self.adjust_score(exit_square[0], exit_square[1], self._ray_color)  # adjust score with exit ray position
+
+        if self._log is not None:
+            self._log.record_ray(row, column, exit_square, self._score - score, self._score)
+        return exit_square
+
+    def adjust_score(self, row, column, color, atom_guess=None):
+        """Accepts as parameters a row and column and assignment for the variable atom_guess (default
+        argument of None). If the method call initiates from shoot_ray method, the default argument of None is used
+        and decrements the player's score by 1 point if the entry/exit square has not already been used. The square
+        keeps the color of the first ray that used it. If the method call originates from the guess_atom method, the
+        atom_guess default argument is utilized and 5 points are deducted from the player's score if the guess is not a
+        previous guess. Does not return anything."""
+
+        # decrement the score for a ray entry/exit point
+        if atom_guess is None:
+            if (row, column) not in self._ray_locations:
+                self._ray_locations[(row, column)] = color              # add to ray locations with its color
+                self._gameB.update_ray_points(row, column)          # update the used ray location to game board visual
+                self._score -= 1                                    # decrement the score by 1 point
+
+        # decrement the score for an atom guess
+        if atom_guess is True:
+            if (row, column) not in self._wrong_atom_guesses:
+                self._wrong_atom_guesses.add((row, column))               # add to wrong atom guesses
+                self._score -= 5                                          # decrement the score by 5 points
+
+    def guess_atom(self, row, column):
+        """Accepts as parameters a row and column that represents the player's guess for an atom location. Returns True
+        if the guess is correct, or repeats a correct guess. If the guess is incorrect, decrements the player's score
+        and returns False. The guess is recorded to the game log, if there is one."""
+
+        score = self._score
+
+        if (row, column) in self._correct_atom_guesses:         # atom already found, nothing to charge
+            correct = True
+
+        elif (row, column) in self._atoms:
+            self._atoms.remove((row, column))                   # if guess is an atom, remove it from the atom set
+            self._correct_atom_guesses.add((row, column))       # add to correct atom guesses
+            correct = True
+
+        else:
+            # if guess is incorrect, send the guess to adjust_score and include parameter 'True' to indicate atom guess
+            self.adjust_score(row, column, None, True)
+            correct = False
+
+        if self._log is not None:
+            self._log.record_guess(row, column, correct, self._score - score, self._score)
+        return correct
+
+    def atoms_left(self):
+        """Accepts no parameters and returns the number of atoms that haven't been guessed."""
+        return len(self._atoms)
+
+    def get_game_result(self):
+        """Accepts no parameters. Returns 'Win' once all atoms are guessed, 'Loss' if the score has reached zero
+        first, or None while the game is still in play."""
+
+        if len(self._atoms) == 0:
+            return 'Win'
+        if self._score <= 0:
+            return 'Loss'
+        return None
+
+    def get_score(self):
+        """Accepts no parameters and returns the player's current score."""
+        return self._score
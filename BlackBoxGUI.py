@@ -3,304 +3,120 @@
 # Description: Single-player implementation of the logic and strategy game 'Black Box'.
 #               Main file for game play.
 
+import os
+import sys
+from time import perf_counter
 import pygame
-from random import sample
-from itertools import product
-from Board import GameBoard
-
-class BlackBoxGame:
-    """Implementation of the Black Box game. Contains method to create a GameBoard instance with indicated atom
-    placement. Contains methods to shoot rays, adjust the game score, guess atom locations, get the current score,
-    and get how many atoms are left to guess."""
-
-    def __init__(self):
-        self._atom_list = sample(list(product(range(1,9), repeat=2)), k=5)  # initialize random list of atom locations
-        self._gameB = GameBoard(self._atom_list)        # initialize a game board with the atom list
-        self._board = self._gameB.get_board()           # get the game board for calculating ray path
-        self._score = 25                                # initialize the starting points for the game
-        self._ray_locations = []                        # empty list to store ray entry/exit squares
-        self._wrong_atom_guesses = []                   # empty list to store incorrect atom guesses
-        self._correct_atom_guesses = []                 # empty list to store correct atom guesses
-        self._ray_status = None
-        self._ray_row = None
-        self._ray_column = None
-        self._screen = pygame.display.set_mode((600, 800))
-        self._font = pygame.font.Font('freesansbold.ttf', 36)
-        self.background = pygame.image.load('board_grid.png')
-        self.background = pygame.transform.scale(self.background, (600, 600))
+from BlackBoxEngine import BlackBoxEngine
+from Board import BOARD_SIZE, ATOM_COUNT
+from GameLog import GameLogWriter
+
+# most frames drawn per second by the game loop
+FRAME_RATE = 30
+
+# width and height in pixels of the board area at the top of the window. Squares are scaled to fit in it.
+BOARD_PIXELS = 600
+
+# colors of the ray markers, one per ray in the order the rays are shot
+RAY_COLORS = [(91, 109, 212), (237, 210, 159), (195, 124, 242),
+              (182, 252, 251), (45, 51, 237), (247, 243, 2), (123, 31, 181),
+              (237, 104, 2), (242, 124, 226), (62, 47, 135), (106, 33, 122)]
+
+# background image of the standard board and the font of the score and messages. The image is found next to this file.
+BOARD_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'board_grid.png')
+FONT_NAME = 'freesansbold.ttf'
+FONT_SIZE = 36
+
+# most rendered text surfaces kept in the cache before it is emptied
+MAX_TEXT_SURFACES = 256
+
+# Assets shared by every game in the process. Each is loaded the first time a game needs it, so importing this module
+# costs nothing and a new game reuses what earlier games loaded. Emptied by clear_assets.
+_FONTS = {}                 # font by point size
+_BASES = {}                 # empty screen (background color and board) by board size
+_TEXT = {}                  # rendered text surface by (string, color)
+
+class BlackBoxGame(BlackBoxEngine):
+    """Pygame interface for the Black Box game. Game play (shooting rays, guessing atoms and scoring) is inherited
+    from BlackBoxEngine. Contains methods to handle mouse events, draw markers, and draw the current score and the
+    number of atoms left to guess."""
+
+    def __init__(self, atom_list=None, size=BOARD_SIZE, atom_count=ATOM_COUNT, log=None, instrumentation=None):
+        """Accepts as optional parameters a list of atom positions, the number of rows and columns inside the 'black
+        box', the number of atoms, a game log and an instrumentation, which are passed to BlackBoxEngine. Opens the
+        game window, or reuses it if it is already open. The font and board background come from the shared asset
+        cache, so only the first game of each board size loads them. With instrumentation, every screen update is
+        also timed."""
+
+        super().__init__(atom_list, size=size, atom_count=atom_count, log=log, instrumentation=instrumentation)
+        if instrumentation is not None:
+            self.update_screen = self._timed_update_screen
+        self._square_pixels = BOARD_PIXELS // (size + 2)        # width and height of one square in pixels
+        self._screen = pygame.display.get_surface()
+        if self._screen is None or self._screen.get_size() != (BOARD_PIXELS, 800):
+            self._screen = pygame.display.set_mode((BOARD_PIXELS, 800))
+        self._font = get_font()
+        self._base = get_base(size)                     # empty screen to redraw from
         self._game_status = True
-        self._ray_color = None
 
-    def shoot_ray(self, row, column):
-        """Accepts as parameters a row and column that designates the entry point of a ray. Simulates the ray path
-        with appropriate hit, detours and/or reflections. Returns 'False' if the entry row and column are not legal
-        plays (non-corner border squares). Returns 'None' if the play is a hit. Returns a tuple of exit square row and
-        column if the play exits the game black box. Deducts from the player's score: 1 point for ray entry and 1 point
-        for ray exit, if the squares have not already been used."""
-
-        # check if ray is being shot from corner square
-        if (row == 0 or row == 9) and (column == 0 or column == 9):
-            return False
-
-        # check if ray is being shot from non-border square
-        if row in range(1, 9) and column in range(1, 9):
-            return False
-
-        if self._ray_color is None:
-            self._ray_color = 0
-        else:
-            self._ray_color += 1
-
-        self.adjust_score(row, column, self._ray_color)                                  # adjust score for entry ray position
-        self._ray_status = 'Play'                                       # set flag variable for ray status
-
-        if column == 0 or column == 9:                                  # if shooting from horizontal position
-            if column == 0:                                             # if ray is moving to the right
-                self.horiz_move_right(row, column)
-            elif column == 9:                                           # if ray is moving to the left
-                self.horiz_move_left(row, column)
-
-        if row == 0 or row == 9:                                        # if shooting from vertical position
-            if row == 0:                                                # if ray is moving down
-                self.vert_move_down(row, column)
-            elif row == 9:                                              # if ray is moving up
-                self.vert_move_up(row, column)
-
-        if self._ray_status == "Hit":                                   # if ray hits an atom
-            return None
-
-        elif self._ray_status == "Exit":                                # if ray is a miss
-            self.adjust_score(self._ray_row, self._ray_column, self._ray_color)          # adjust score with exit ray position
-            return self._ray_row, self._ray_column
-
-    def horiz_move_right(self, ray_path_r, ray_path_c):
-        """Accepts as parameters the current row and column of the ray path. Calculates the next square of
-        a horizontal ray path to the right and determines if there are any atoms resulting in a hit or detour.
-        Adjusts ray status variable if there is a Hit or Exit. Returns nothing."""
-
-        self._ray_row = ray_path_r
-        self._ray_column = ray_path_c
-
-        while self._ray_status == "Play":                       # continue ray path determination while still in "play"
-
-            # check for edge case reflection
-            if ray_path_c == 0 and self._ray_column == 0:
-                if (self._board[ray_path_r+1][ray_path_c+1]) or (self._board[ray_path_r-1][ray_path_c+1]) == 'A':
-                    self._ray_column -=1
-                    self._ray_status = "Exit"
-
-            self._ray_column += 1                               # move ray path one square to the right
-
-            # check if ray is exiting 'black box'
-            if self._ray_column == 9:
-                self._ray_status = "Exit"
-
-            # check for hit
-            elif self._board[self._ray_row][self._ray_column] == 'A':  # if atom is in next ray path square
-                self._ray_status = "Hit"
-
-            # check for reflection
-            elif (self._board[self._ray_row+1][self._ray_column]) and (self._board[self._ray_row-1][self._ray_column]) == 'A':
-                self._ray_column -=1
-                self.horiz_move_left(self._ray_row, self._ray_column)
-
-            # check for detour (change ray path to 'up)
-            elif self._board[self._ray_row + 1][self._ray_column] == 'A':
-                self._ray_column -=1
-                self.vert_move_up(self._ray_row, self._ray_column)
-
-            # check for detour (change ray path to 'down)
-            elif self._board[self._ray_row-1][self._ray_column] == 'A':
-                self._ray_column -=1
-                self.vert_move_down(self._ray_row, self._ray_column)
-
-    def horiz_move_left(self, ray_path_r, ray_path_c):
-        """Accepts as parameters the current row and column of the ray path. Calculates the next square of
-        a horizontal ray path moving to the left and determines if there are any atoms resulting in a hit or detour.
-        Adjusts ray status variable if there is a Hit or Exit. Returns nothing."""
-
-        self._ray_row = ray_path_r
-        self._ray_column = ray_path_c
-
-        while self._ray_status == "Play":                      # continue ray path determination while still in "play"
-
-            # check for edge case reflection
-            if ray_path_c == 9 and self._ray_column == 9:
-                if (self._board[ray_path_r+1][ray_path_c-1]) or (self._board[ray_path_r-1][ray_path_c-1]) == 'A':
-                    self._ray_column +=1
-                    self._ray_status = "Exit"
-
-            self._ray_column -= 1                              # move ray path one square to the left
-
-            # check for exit
-            if self._ray_column == 0:
-                self._ray_status = "Exit"
-
-            # check for hit
-            elif self._board[self._ray_row][self._ray_column] == 'A':  # if atom is in next ray path square
-                self._ray_status = "Hit"
-
-            # check for reflection
-            elif (self._board[self._ray_row+1][self._ray_column]) and (self._board[self._ray_row-1][self._ray_column]) == 'A':
-                self._ray_column += 1
-                self.horiz_move_right(self._ray_row, self._ray_column)
-
-            # check for detour (change to 'up' direction)
-            elif self._board[self._ray_row + 1][self._ray_column] == 'A':
-                self._ray_column +=1
-                self.vert_move_up(self._ray_row, self._ray_column)
-
-            # check for detour (change to 'down' direction)
-            elif self._board[self._ray_row-1][self._ray_column] == 'A':
-                self._ray_column +=1
-                self.vert_move_down(self._ray_row, self._ray_column)
-
-    def vert_move_down(self, ray_path_r, ray_path_c):
-        """Accepts as parameters the current row and column of the ray path. Calculates the next square of a vertical
-        ray path moving down and determines if there are any atoms resulting in a hit or detour. Adjusts ray status
-        variable if there is a Hit or Exit. Returns nothing."""
-
-        self._ray_row = ray_path_r
-        self._ray_column = ray_path_c
-
-        while self._ray_status == "Play":                       # continue ray path determination while still in "play"
-
-            # check for edge case reflection
-            if ray_path_r == 0 and self._ray_row == 0:
-                if (self._board[ray_path_r+1][ray_path_c+1]) or (self._board[ray_path_r+1][ray_path_c-1]) == 'A':
-                    self._ray_row -=1
-                    self._ray_status = "Exit"
-
-            self._ray_row += 1                                 # adjust ray path one square 'down'
-
-            # check for exit
-            if self._ray_row == 9:
-                self._ray_status = "Exit"
-
-            # check for hit
-            elif self._board[self._ray_row][self._ray_column] == 'A':  # if atom is in next ray path square
-                self._ray_status = "Hit"
-
-            # check for reflection
-            elif (self._board[self._ray_row][self._ray_column+1]) and (self._board[self._ray_row][self._ray_column-1]) == 'A':
-                self._ray_row -=1
-                self.vert_move_up(self._ray_row, self._ray_column)
-
-            # check for detour (change direction to 'left' direction)
-            elif self._board[self._ray_row][self._ray_column +1] == 'A':
-                self._ray_row -= 1
-                self.horiz_move_left(self._ray_row, self._ray_column)
-
-            # check for detour (change direction to 'right' direction
-            elif self._board[self._ray_row][self._ray_column-1] == 'A':
-                self._ray_row -= 1
-                self.horiz_move_right(self._ray_row, self._ray_column)
-
-    def vert_move_up(self, ray_path_r, ray_path_c):
-        """Accepts as parameters the current row and column of the ray path. Calculates the next square of a vertical
-        ray path moving up and determines if there are any atoms resulting in a hit or detour. Adjusts ray status
-        variable if there is a Hit or Exit. Returns nothing."""
-
-        self._ray_row = ray_path_r
-        self._ray_column = ray_path_c
-
-        while self._ray_status == "Play":                       # continue ray path determination while still in "play"
-
-            # check for edge case reflection
-            if ray_path_r == 9 and self._ray_row == 9:
-                if (self._board[ray_path_r-1][ray_path_c+1]) or (self._board[ray_path_r-1][ray_path_c-1]) == 'A':
-                    self._ray_row +=1
-                    self._ray_status = "Exit"
-
-            self._ray_row -= 1                                  # adjust ray path one square in 'up' direction
-
-            # check for exit
-            if self._ray_row == 0:
-                self._ray_status = "Exit"
-
-            # check for hit
-            elif self._board[self._ray_row][self._ray_column] == 'A':  # if atom is in next ray path square
-                self._ray_status = "Hit"
-
-            # check for reflection
-            elif (self._board[self._ray_row][self._ray_column+1]) and (self._board[self._ray_row][self._ray_column-1]) == 'A':
-                # self._ray_row +=1
-                self.vert_move_down(self._ray_row, self._ray_column)
-
-            # check for detour (change direction to 'left' direction)
-            elif self._board[self._ray_row][self._ray_column +1] == 'A':
-                self._ray_row += 1
-                self.horiz_move_left(self._ray_row, self._ray_column)
-
-            # check for detour (change direction to 'right' direction)
-            elif self._board[self._ray_row][self._ray_column-1] == 'A':
-                self._ray_row += 1
-                self.horiz_move_right(self._ray_row, self._ray_column)
+        self._drawn_text = {}                           # text currently drawn at each y-coordinate
+        self._drawn_markers = (set(), set(), set())     # squares of the ray, wrong and correct markers drawn
+        self._full_redraw = True
 
     def update_game_status(self):
-        """Update the game status for game win or loss. Display message to screen."""
-
-        # update for a game loss, score below 0
-        if self._score <= 0:  # check if game is over (score of 0 or less)
-            game_loss = self._font.render('YOU LOSE!   FINAL SCORE: ' + str(self._score), True, (0, 0, 0))
-            self._screen.blit(game_loss, (10, 750))
-            for atom in self._atom_list:
-                self.draw_marker((0, 0, 0), atom)
-            pygame.display.update()
-
-        if len(self._atom_list) == 0:                       # once all atoms are guessed, the game is over
-            game_win = self._font.render('YOU WIN!   FINAL SCORE: ' + str(self._score), True, (0, 0, 0))
-            self._screen.blit(game_win, (10, 750))
-
-    def adjust_score(self, row, column, color, atom_guess=None):
-        """Accepts as parameters a row and column and assignment for the variable atom_guess (default
-        argument of None). If the method call initiates from shoot_ray method, the default argument of None is used
-        and decrements the player's score by 1 point if the entry/exit square has not already been used. If the method
-        call originates from the guess_atom method, the atom_guess default argument is utilized and 5 points are
-        deducted from the player's score if the guess is not a previous guess. Does not return anything."""
-
-        # decrement the score for a ray entry/exit point
-        if atom_guess is None:
-            if (row, column) not in self._ray_locations:
-                self._ray_locations.append((row, column, color))           # add to ray locations list
-                self._gameB.update_ray_points(row, column)          # update the used ray location to game board visual
-                self._score -= 1                                    # decrement the score by 1 point
-
-        # decrement the score for an atom guess
-        if atom_guess is True:
-            if (row, column) not in self._wrong_atom_guesses:
-                self._wrong_atom_guesses.append((row, column))            # add to atom_guesses list
-                self._score -= 5                                          # decrement the score by 5 points
-
-    def guess_atom(self, row, column):
-        """Accepts as parameters a row and column that represents the player's guess for an atom location. Returns True
-        if the guess is correct. If the guess is incorrect, decrements the player's score and returns False."""
-
-        if (row, column) in self._atom_list:
-            self._atom_list.remove((row, column))               # if guess is in atom list, remove from list
-            self._correct_atom_guesses.append((row, column))    # add to correct atom guess list
-            return True
-
-        else:
-            # if guess is incorrect, send the guess to adjust_score and include parameter 'True' to indicate atom guess
-            self.adjust_score(row, column, None, True)
-            return False
-
-    def atoms_left(self):
-        """Accepts no parameters and returns the number of atoms that haven't been guessed."""
-        atoms_left = self._font.render('Atoms Left: ' + str(len(self._atom_list)), True, (0, 0, 0))
-        self._screen.blit(atoms_left, (10, 670))
+        """Update the game status for game win or loss. Display message to screen. The message is chosen from the
+        game result, so only one of them is drawn even if the score reached zero before the last atom was found.
+        Returns a list of the screen rectangles that changed."""
+
+        rects = []
+        result = self.get_game_result()
+
+        # update for a game loss, score of 0 or less before every atom is found
+        if result == 'Loss':
+            rect = self.draw_text('YOU LOSE!   FINAL SCORE: ' + str(self._score), 750)
+            if rect is not None:
+                rects.append(rect)
+                for atom in self._atoms:
+                    rects.append(self.draw_marker((0, 0, 0), atom))
+
+        if result == 'Win':                                 # once all atoms are guessed, the game is over
+            rect = self.draw_text('YOU WIN!   FINAL SCORE: ' + str(self._score), 750)
+            if rect is not None:
+                rects.append(rect)
+
+        return rects
+
+    def draw_atoms_left(self):
+        """Accepts no parameters. Draws the number of atoms that haven't been guessed to the screen. Returns the
+        screen rectangle that changed, or None."""
+        return self.draw_text('Atoms Left: ' + str(self.atoms_left()), 670)
+
+    def draw_score(self):
+        """Accepts no parameters. Draws the player's current score to the screen. Returns the screen rectangle that
+        changed, or None."""
+        return self.draw_text('Score: ' + str(self.get_score()), 610)
+
+    def draw_text(self, text, y_coord):
+        """Accepts as parameters a string and the y-coordinate of its line of text. If the line is not already
+        showing that string, clears the line and draws it. Rendered strings come from the shared asset cache. Returns
+        the screen rectangle of the line if it changed, or None."""
+
+        if self._drawn_text.get(y_coord) == text:
+            return None
 
-    def get_score(self):
-        current_score = self._font.render('Score: ' + str(self._score), True, (0, 0, 0))
-        self._screen.blit(current_score,(10, 610))
+        surface = render_text(text)
+        line = pygame.Rect(0, y_coord, self._screen.get_width(), self._font.get_linesize())
+        self._screen.blit(self._base, line, line)
+        self._screen.blit(surface, (10, y_coord))
+        self._drawn_text[y_coord] = text
+        return line
 
     def calculate_square(self, coord):
         """Accepts as a parameter the x- y- coordinates of a mouse click and calculates the corredsponding row and column
         of the board game square. The x- coordinate is equivalent to the column and the y-coordinate is equivalent to
         the column"""
-        col = (coord[0] // 60)
-        row = (coord[1] // 60)
+        col = (coord[0] // self._square_pixels)
+        row = (coord[1] // self._square_pixels)
         return col, row
 
     def check_events(self):
@@ -312,53 +128,146 @@ class BlackBoxGame:
             if event.type == pygame.QUIT:
                 self._game_status = False
 
+            # redraw everything if the window contents were lost
+            if event.type == pygame.VIDEOEXPOSE:
+                self._full_redraw = True
+
             # get coordinates of mouse click
             if event.type == pygame.MOUSEBUTTONDOWN:
                 pos = pygame.mouse.get_pos()
                 pos_tup = self.calculate_square(pos)  # change x-y coord to square of row, column
                 row = pos_tup[0]
                 column = pos_tup[1]
-                if (row == 0 or row == 9) or (column == 0 or column == 9):
+                last = self._size + 1
+                if row > last or column > last:         # click below or beside the board
+                    continue
+                if (row == 0 or row == last) or (column == 0 or column == last):
                     self.shoot_ray(row, column)
-                elif 0 < row < 9 and 0 < column < 9:
+                elif 0 < row < last and 0 < column < last:
                     self.guess_atom(row, column)
 
     def update_screen(self):
-        """Update display screen with ray locations, atom location, current score, and atoms left to guess"""
-
-        color_list = [(91, 109, 212), (237, 210, 159), (195, 124, 242),
-                      (182, 252, 251), (45, 51, 237), (247, 243, 2), (123, 31, 181),
-                      (237, 104, 2), (242, 124, 226), (62, 47, 135), (106, 33, 122)]
-
-        self._screen.fill((240, 240, 240))
-        self._screen.blit(self.background, (0, 0))
-        self.get_score()
-        self.atoms_left()
-        for ray in self._ray_locations:
-            self.draw_marker(color_list[ray[2]], (ray[0], ray[1]))
-        for atom in self._wrong_atom_guesses:
-            self.draw_marker((255,0,0), atom)
-        for atom in self._correct_atom_guesses:
-            self.draw_marker((20, 255, 3), atom)
+        """Update display screen with ray locations, atom location, current score, and atoms left to guess. Only
+        draws markers and text that changed since the last call, and only updates those parts of the display. Does
+        nothing if the game state has not changed."""
+
+        if self._full_redraw:
+            self._screen.blit(self._base, (0, 0))
+            self._drawn_text = {}
+            self._drawn_markers = (set(), set(), set())
+
+        rays_drawn, wrong_drawn, correct_drawn = self._drawn_markers
+        rects = []
+        for square in self._ray_locations.keys() - rays_drawn:
+            color = self._ray_locations[square]
+            rects.append(self.draw_marker(RAY_COLORS[color % len(RAY_COLORS)], square))
+        for atom in self._wrong_atom_guesses - wrong_drawn:
+            rects.append(self.draw_marker((255,0,0), atom))
+        for atom in self._correct_atom_guesses - correct_drawn:
+            rects.append(self.draw_marker((20, 255, 3), atom))
+        rays_drawn.update(self._ray_locations)
+        wrong_drawn.update(self._wrong_atom_guesses)
+        correct_drawn.update(self._correct_atom_guesses)
+
+        rects.append(self.draw_score())
+        rects.append(self.draw_atoms_left())
+        rects.extend(self.update_game_status())
+        rects = [rect for rect in rects if rect is not None]
+
+        if self._full_redraw:
+            pygame.display.update()
+            self._full_redraw = False
+        elif rects:
+            pygame.display.update(rects)
 
-        self.update_game_status()
+    def _timed_update_screen(self):
+        """Updates the screen like update_screen, and reports the time taken to the instrumentation."""
 
-        pygame.display.update()
+        start = perf_counter()
+        type(self).update_screen(self)
+        self._instrumentation.record_frame(perf_counter() - start)
 
     def draw_marker(self, color, pos):
-        """Accepts a color as a parameter. Draws a marker at the indicated position (x-y coordinates)"""
+        """Accepts a color as a parameter. Draws a marker at the indicated position (x-y coordinates). Returns the
+        screen rectangle of the marker."""
 
-        x_coord = pos[1]*60 + 30
-        y_coord = pos[0]*60 + 30
-        pygame.draw.circle(self._screen, color, (y_coord, x_coord), 20, 50)
+        pixels = self._square_pixels
+        x_coord = pos[1]*pixels + pixels // 2
+        y_coord = pos[0]*pixels + pixels // 2
+        return pygame.draw.circle(self._screen, color, (y_coord, x_coord), max(pixels // 3, 1))
 
     def get_game_status(self):
         return self._game_status
 
 
+def get_font(point_size=FONT_SIZE):
+    """Accepts as an optional parameter a point size. Returns the game font in that size, loading it the first time.
+    pygame.font must be initialized."""
+
+    font = _FONTS.get(point_size)
+    if font is None:
+        font = _FONTS[point_size] = pygame.font.Font(FONT_NAME, point_size)
+    return font
+
+
+def render_text(text, color=(0, 0, 0)):
+    """Accepts as parameters a string and an optional color. Returns the string rendered in the game font, rendering
+    it the first time it is asked for in that color."""
+
+    surface = _TEXT.get((text, color))
+    if surface is None:
+        if len(_TEXT) >= MAX_TEXT_SURFACES:       # keep memory bounded if many different strings are drawn
+            _TEXT.clear()
+        surface = _TEXT[(text, color)] = get_font().render(text, True, color)
+    return surface
+
+
+def get_base(size=BOARD_SIZE):
+    """Accepts as an optional parameter the number of rows and columns inside the 'black box'. Returns the empty
+    screen for that board: the background color with the background image (or, for other sizes, a drawn grid)
+    scaled to fit the board area. Made the first time it is asked for. The display mode must be set."""
+
+    base = _BASES.get(size)
+    if base is None:
+        square_pixels = BOARD_PIXELS // (size + 2)
+        board_pixels = square_pixels * (size + 2)
+        if size == BOARD_SIZE:
+            background = pygame.transform.scale(pygame.image.load(BOARD_IMAGE), (board_pixels, board_pixels))
+        else:
+            background = draw_grid(size, square_pixels)
+        base = _BASES[size] = pygame.Surface(pygame.display.get_surface().get_size()).convert()
+        base.fill((240, 240, 240))
+        base.blit(background, (0, 0))
+    return base
+
+
+def draw_grid(size, square_pixels):
+    """Accepts as parameters the number of rows and columns inside the 'black box' and the width of a square in
+    pixels. Returns a surface with the board grid for board sizes that the background image does not fit: grey
+    border squares, white squares inside the 'black box' and grid lines."""
+
+    pixels = square_pixels
+    width = size + 2
+    grid = pygame.Surface((pixels * width, pixels * width))
+    grid.fill((220, 220, 220))
+    grid.fill((255, 255, 255), pygame.Rect(pixels, pixels, pixels * size, pixels * size))
+    for line in range(0, width + 1):
+        pygame.draw.line(grid, (180, 180, 180), (line * pixels, 0), (line * pixels, pixels * width))
+        pygame.draw.line(grid, (180, 180, 180), (0, line * pixels), (pixels * width, line * pixels))
+    return grid
+
+
+def clear_assets():
+    """Accepts no parameters. Empties the shared asset cache. Call it after pygame.quit, since the cached fonts and
+    surfaces cannot be used once pygame is shut down."""
+
+    _FONTS.clear()
+    _BASES.clear()
+    _TEXT.clear()
+
 
-def main():
-    """Main game play code"""
+def main(log_path=None):
+    """Main game play code. Accepts as an optional parameter a file path to record the game to (see GameLog)."""
 
     pygame.init()  # initialize pygame
 
@@ -374,17 +283,23 @@ def main():
     # Title
     pygame.display.set_caption("Black Box Game")
 
-    current_game = BlackBoxGame()
+    log = GameLogWriter(log_path) if log_path is not None else None
+    current_game = BlackBoxGame(log=log)
+    clock = pygame.time.Clock()
 
     # Game loop
 
     while current_game.get_game_status():
         current_game.check_events()
         current_game.update_screen()
+        clock.tick(FRAME_RATE)                  # wait so the loop runs at most FRAME_RATE times a second
 
+    if log is not None:
+        log.close()
     pygame.quit()
+    clear_assets()
 
 
 if __name__ == '__main__':
-    main()
+    main(sys.argv[1] if len(sys.argv) > 1 else None)      # optional game log path
 
@@ -2,21 +2,116 @@
 # Date: 8/25/2020
 # Description: Class GameBoard for the game implementation of 'Black Box'
 
+from collections import namedtuple
+
+# Result of tracing a single ray. status is 'Hit', 'Reflection' or 'Exit'. exit is the (row, column) of the square
+# the ray leaves the black box from (None for a hit, the entry square for a reflection). path is a tuple of every
+# square the ray visited, starting with the entry square.
+RayResult = namedtuple('RayResult', ['status', 'exit', 'path'])
+
+# number of rows and columns inside the black box, and number of atoms, of the standard game
+BOARD_SIZE = 8
+ATOM_COUNT = 5
+
+
+def max_ray_steps(size=BOARD_SIZE):
+    """Accepts as an optional parameter the number of rows and columns inside the black box. Returns the maximum
+    number of steps for a single ray: each square can be passed at most once in each of the four directions."""
+    return 4 * (size + 2) * (size + 2)
+
+
+def entry_squares(size=BOARD_SIZE):
+    """Accepts as an optional parameter the number of rows and columns inside the black box. Returns a tuple of the
+    legal ray entry squares (the non-corner border squares) in a fixed order: top, bottom, left and right borders."""
+
+    last = size + 1
+    return tuple([(0, column) for column in range(1, last)] + [(last, column) for column in range(1, last)] +
+                 [(row, 0) for row in range(1, last)] + [(row, last) for row in range(1, last)])
+
+
+def interior_squares(size=BOARD_SIZE):
+    """Accepts as an optional parameter the number of rows and columns inside the black box. Returns a list of the
+    (row, column) squares inside the black box, row by row."""
+    return [(row, column) for row in range(1, size + 1) for column in range(1, size + 1)]
+
+
+def border_mask(size=BOARD_SIZE):
+    """Accepts as an optional parameter the number of rows and columns inside the black box. Returns a bitboard with
+    one bit per border square. Square (row, column) is bit row * (size + 2) + column."""
+
+    width = size + 2
+    mask = (1 << width) - 1                                 # top row
+    mask |= mask << (width * (width - 1))                   # bottom row
+    for row in range(1, width - 1):
+        mask |= (1 | 1 << (width - 1)) << (row * width)     # first and last square of the row
+    return mask
+
+
+# maximum number of steps for a single ray on the standard board
+MAX_RAY_STEPS = max_ray_steps()
+
+# the 32 legal ray entry squares of the standard board in a fixed order: top, bottom, left and right borders
+ENTRY_SQUARES = entry_squares()
+
+# bitboard with one bit per border square of the standard board. Square (row, column) is bit row * 10 + column.
+BORDER_MASK = border_mask()
+
+
+def atom_mask(atom_list, size=BOARD_SIZE):
+    """Accepts as parameters a list of tuples designating atom positions and the optional number of rows and columns
+    inside the black box. Returns the atoms as a bitboard with bit row * (size + 2) + column set for each atom."""
+
+    width = size + 2
+    mask = 0
+    for row_a, column_a in atom_list:
+        mask |= 1 << (row_a * width + column_a)
+    return mask
+
+
 class GameBoard:
-    """Implementation of a game board consisting of a 10 x 10 grid to be used in the Black Box game. Contains an init
-    method that accepts a list of atoms as a parameter, initializes the board, places the  atoms on the game board.
-    Contains an update ray points method to visualize where entry and exit rays throughout game play, a get board
-    method that returns the game board, and a print board method to print the game board to the game console."""
-
-    def __init__(self, atom_list):
-        """Initializes an empty board game with a total of 10 rows and 10 columns. The inner 8 rows and 8 columns
-        represent the black box containing the atoms. The border squares represent ray entry and exit points. The
-        corner squares cannot be utilized in game play. Accepts as a parameter a list of tuples designating atom
-        positions on the board and sets the game board with those locations. Returns nothing."""
-
-        self._board = [['' for row in range(0, 10)] for column in range(0, 10)]
+    """Implementation of a game board consisting of a 10 x 10 grid (by default) to be used in the Black Box game.
+    Contains an init method that accepts a list of atoms as a parameter, initializes the board, places the  atoms on
+    the game board. Contains an update ray points method to visualize where entry and exit rays throughout game play,
+    methods to trace a ray, to get the result of one ray and to get the cached table of ray results for every entry
+    square, a get board method that returns the game board, and a print board method to print the game board to the
+    game console."""
+
+    def __init__(self, atom_list, size=BOARD_SIZE):
+        """Initializes an empty board game with a total of size + 2 rows and columns (10 by default). The inner rows
+        and columns represent the black box containing the atoms. The border squares represent ray entry and exit
+        points. The corner squares cannot be utilized in game play. Accepts as a parameter a list of tuples
+        designating atom positions on the board and sets the game board with those locations. Returns nothing."""
+
+        self._size = size
+        self._width = size + 2
+        self._ray_table = {}
+        self._place_atoms(atom_list)
+
+    def _place_atoms(self, atom_list):
+        """Accepts as a parameter a list of tuples designating atom positions. Creates the list of lists of the game
+        board with the atoms in it, and the set of atom square indexes used to trace rays. Does not return anything."""
+
+        self._board = [['' for row in range(0, self._width)] for column in range(0, self._width)]
         for row_a, column_a in atom_list:
             self._board[row_a][column_a] = 'A'
+        self._atom_squares = frozenset(row_a * self._width + column_a for row_a, column_a in atom_list)
+
+    def _atom_test(self):
+        """Accepts no parameters. Returns a function that accepts a square index (row * (size + 2) + column) and
+        returns whether an atom is on it. Used by trace_ray."""
+        return self._atom_squares.__contains__
+
+    def _border_test(self):
+        """Accepts no parameters. Returns a function that accepts a square index (row * (size + 2) + column) and
+        returns whether it is a border square. Used by trace_ray."""
+
+        width = self._width
+        last = width - 1
+
+        def is_border(square):
+            row, column = divmod(square, width)
+            return row == 0 or row == last or column == 0 or column == last
+        return is_border
 
     def update_ray_points(self, row, column):
         """Accepts as parameters a row and column that represents a ray entry or exit square. Places an 'X' symbol
@@ -24,6 +119,104 @@ class GameBoard:
 
         self._board[row][column] = 'X'
 
+    def trace_ray(self, row, column, on_turn=None):
+        """Accepts as parameters the row and column of a legal (non-corner border) entry square, and an optional
+        function that is called with 'Detour' or 'Reflection' at each turn of the ray (an edge case reflection is a
+        reflection too), for counting turns that the path alone does not show. Follows the ray one square at a time
+        using a direction vector, checking the next square for a hit and the squares beside it for detours and
+        reflections. An atom beside the first square of the black box is an edge case reflection, which is checked
+        before a hit. Atoms and border squares are looked up with the tests of _atom_test and _border_test, so the
+        cost of a ray depends on the length of its path and not on the size of the board. Does not recurse and walks
+        at most max_ray_steps steps. Returns a RayResult with the ray status, exit square and path."""
+
+        is_atom = self._atom_test()
+        is_border = self._border_test()
+        width = self._width
+        last = width - 1
+        start = row * width + column
+
+        # set the starting direction of the ray from the entry border. The direction is the change in square index
+        # for one step: +/-1 moves along a row, +/-width moves along a column.
+        if column == 0:
+            direction = 1
+        elif column == last:
+            direction = -1
+        elif row == 0:
+            direction = width
+        else:
+            direction = -width
+
+        ray = start
+        path = [(row, column)]
+
+        for step in range(max_ray_steps(self._size)):
+            ahead = ray + direction
+            side = direction * width if direction in (1, -1) else direction // width     # perpendicular step
+
+            # check if ray is exiting 'black box'
+            if is_border(ahead):
+                path.append(divmod(ahead, width))
+                if ahead == start:
+                    return RayResult('Reflection', (row, column), tuple(path))
+                return RayResult('Exit', divmod(ahead, width), tuple(path))
+
+            # atoms on either side of the next square
+            side_a = is_atom(ahead + side)
+            side_b = is_atom(ahead - side)
+
+            # check for edge case reflection
+            if (side_a or side_b) and ray == start:
+                if on_turn is not None:
+                    on_turn('Reflection')
+                return RayResult('Reflection', (row, column), tuple(path))
+
+            # check for hit
+            if is_atom(ahead):
+                path.append(divmod(ahead, width))
+                return RayResult('Hit', None, tuple(path))
+
+            if side_a or side_b:
+                if on_turn is not None:
+                    on_turn('Reflection' if side_a and side_b else 'Detour')
+                if side_a and side_b:                   # reflection, reverse direction
+                    direction = -direction
+                elif side_a:                            # detour away from the atom
+                    direction = -side
+                else:
+                    direction = side
+                continue
+
+            ray = ahead                                 # move ray path one square
+            path.append(divmod(ray, width))
+
+        raise RuntimeError('Ray from ' + str((row, column)) + ' did not finish')
+
+    def get_ray_result(self, row, column):
+        """Accepts as parameters the row and column of a legal (non-corner border) entry square. Returns the
+        RayResult of a ray shot from it. Results are cached, since atom positions do not change during a game. A ray
+        path is reversible, so a ray that exits at another border square also gives the result for a ray shot from
+        that square."""
+
+        result = self._ray_table.get((row, column))
+        if result is None:
+            result = self._ray_table[(row, column)] = self.trace_ray(row, column)
+            if result.status == 'Exit':
+                self._ray_table[result.exit] = RayResult('Exit', (row, column), result.path[::-1])
+        return result
+
+    def get_ray_table(self):
+        """Accepts no parameters. Returns a dictionary mapping every legal entry square to its RayResult. Each ray
+        is traced at most once per board (see get_ray_result)."""
+
+        for row, column in entry_squares(self._size):
+            self.get_ray_result(row, column)
+        return self._ray_table
+
+    def get_signature(self):
+        """Accepts no parameters. Returns a tuple of the exit square (None for a hit) of a ray shot from each entry
+        square, in entry_squares order. Two layouts with the same signature cannot be told apart with rays."""
+        return tuple(self.get_ray_result(row, column).exit for row, column in entry_squares(self._size))
+
     def get_board(self):
         """Accepts no parameters. Returns the current game board state."""
         return self._board
@@ -31,5 +224,52 @@ class GameBoard:
     def print_board(self):
         """Prints the current status of the game board to the console window. Does not return anything."""
 
-        for row in self._board:
-            print(row)
\ No newline at end of file
+        for row in self.get_board():
+            print(row)
+
+
+class BitBoard(GameBoard):
+    """Compact game board for the Black Box game. Stores the atoms and the used ray points as two bitboards (bit
+    row * (size + 2) + column) instead of a list of lists, and traces rays with bit tests on them (GameBoard.trace_ray
+    with bitboard atom and border tests). The get board and print board methods build the list of lists on request."""
+
+    def _place_atoms(self, atom_list):
+        """Accepts as a parameter a list of tuples designating atom positions. Sets the atom, border and ray point
+        bitboards. Does not return anything."""
+
+        self._atoms = atom_mask(atom_list, self._size)
+        self._border = BORDER_MASK if self._size == BOARD_SIZE else border_mask(self._size)
+        self._ray_points = 0
+
+    def _atom_test(self):
+        """Accepts no parameters. Returns a function that accepts a square index and returns whether its bit is set
+        in the atom bitboard."""
+
+        atoms = self._atoms
+        return lambda square: atoms >> square & 1
+
+    def _border_test(self):
+        """Accepts no parameters. Returns a function that accepts a square index and returns whether its bit is set
+        in the border bitboard."""
+
+        border = self._border
+        return lambda square: border >> square & 1
+
+    def update_ray_points(self, row, column):
+        """Accepts as parameters a row and column that represents a ray entry or exit square. Marks the square as
+        used in the ray point bitboard. Does not return anything."""
+
+        self._ray_points |= 1 << (row * self._width + column)
+
+    def get_board(self):
+        """Accepts no parameters. Returns a new list of lists of the current game board state, using 'A' for atoms
+        and 'X' for used ray points."""
+
+        width = self._width
+        board = [['' for row in range(0, width)] for column in range(0, width)]
+        for index in range(0, width * width):
+            if self._atoms >> index & 1:
+                board[index // width][index % width] = 'A'
+            elif self._ray_points >> index & 1:
+                board[index // width][index % width] = 'X'
+        return board
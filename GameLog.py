@@ -0,0 +1,185 @@
+# Description: Compact binary game log for 'Black Box'. GameLogWriter appends a header with the board size and atom
+#               layout, then one fixed-width record per move. GameLogReader memory-maps a log so any move can be read
+#               directly and the game rebuilt at any point without tracing rays again.
+
+import mmap
+import struct
+from collections import namedtuple
+from BlackBoxEngine import BlackBoxEngine, STARTING_SCORE
+
+# A logged move. kind is 'ray' or 'guess'. result is what shoot_ray or guess_atom returned: the (row, column) exit
+# square or None for a hit, or True or False for a guess. score_change is the change in score from the move, and
+# score is the score after it.
+Move = namedtuple('Move', ['kind', 'square', 'result', 'score_change', 'score'])
+
+MAGIC = b'BBXL'
+VERSION = 1
+
+# header: magic, version, board size, atom count. Followed by the row and column of each atom.
+HEADER = struct.Struct('<4sBHH')
+ATOM = struct.Struct('<HH')
+
+# move record: outcome code, row, column, exit row, exit column, score change, score after the move
+RECORD = struct.Struct('<BHHHHhi')
+
+# outcome codes of a move record
+RAY_EXIT, RAY_HIT, GUESS_WRONG, GUESS_CORRECT = 0, 1, 2, 3
+
+
+class GameLogWriter:
+    """Writes a game log to a binary file. Pass it to BlackBoxEngine as the log parameter: the engine calls start
+    with the layout when the game is created, then record_ray or record_guess after each move. Records are appended
+    and the file is flushed after each one, so a log cut short (for example by a killed process) still holds every
+    complete move before the cut."""
+
+    def __init__(self, file):
+        """Accepts as a parameter a file path or a binary file object opened for writing. A path is opened (and
+        overwritten) here and closed by close."""
+
+        if isinstance(file, (str, bytes)) or hasattr(file, '__fspath__'):
+            self._file = open(file, 'wb')
+            self._owns_file = True
+        else:
+            self._file = file
+            self._owns_file = False
+
+    def start(self, size, atom_list):
+        """Accepts as parameters the number of rows and columns inside the black box and the list of (row, column)
+        atom positions. Writes and flushes the log header. Does not return anything."""
+
+        self._file.write(HEADER.pack(MAGIC, VERSION, size, len(atom_list)))
+        for row, column in atom_list:
+            self._file.write(ATOM.pack(row, column))
+        self._file.flush()
+
+    def record_ray(self, row, column, exit_square, score_change, score):
+        """Accepts as parameters the entry square row and column of a ray, its exit square (None for a hit), the
+        change in score and the score after the move. Appends a move record and flushes it. Does not return
+        anything."""
+
+        if exit_square is None:
+            self._file.write(RECORD.pack(RAY_HIT, row, column, 0, 0, score_change, score))
+        else:
+            self._file.write(RECORD.pack(RAY_EXIT, row, column, exit_square[0], exit_square[1], score_change, score))
+        self._file.flush()
+
+    def record_guess(self, row, column, correct, score_change, score):
+        """Accepts as parameters the row and column of an atom guess, whether it was correct, the change in score and
+        the score after the move. Appends a move record and flushes it. Does not return anything."""
+
+        outcome = GUESS_CORRECT if correct else GUESS_WRONG
+        self._file.write(RECORD.pack(outcome, row, column, 0, 0, score_change, score))
+        self._file.flush()
+
+    def close(self):
+        """Accepts no parameters. Flushes the log, and closes the file if it was opened from a path."""
+
+        self._file.flush()
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GameLogReader:
+    """Reads a game log written by GameLogWriter. The file is memory-mapped, so opening a log does not read its
+    moves, and move n is unpacked straight from offset header + n * RECORD.size. Contains methods to get the board
+    size and layout, get a move, iterate over the moves and rebuild the game after any number of moves."""
+
+    def __init__(self, path):
+        """Accepts as a parameter the path of a game log. Maps the file and reads its header. Raises ValueError if
+        the file is not a game log of a known version."""
+
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._map) < HEADER.size:
+            self._map.close()
+            raise ValueError(str(path) + ' is not a Black Box game log')
+        magic, version, self._size, atom_count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(str(path) + ' is not a Black Box game log')
+        if version != VERSION:
+            self._map.close()
+            raise ValueError('Unsupported game log version ' + str(version))
+
+        self._atom_list = [ATOM.unpack_from(self._map, HEADER.size + index * ATOM.size)
+                           for index in range(0, atom_count)]
+        self._first_record = HEADER.size + atom_count * ATOM.size
+        self._move_count = max(len(self._map) - self._first_record, 0) // RECORD.size    # ignores a partial record
+
+    def get_size(self):
+        """Accepts no parameters. Returns the number of rows and columns inside the black box."""
+        return self._size
+
+    def get_atom_list(self):
+        """Accepts no parameters. Returns the list of (row, column) atom positions the game started with."""
+        return list(self._atom_list)
+
+    def __len__(self):
+        """Returns the number of complete moves in the log."""
+        return self._move_count
+
+    def get_move(self, index):
+        """Accepts as a parameter a move number (0 for the first move, negative numbers count from the end).
+        Returns the Move. Raises IndexError if there is no such move."""
+
+        if index < 0:
+            index += self._move_count
+        if not 0 <= index < self._move_count:
+            raise IndexError('move ' + str(index) + ' is not in the log')
+
+        outcome, row, column, exit_row, exit_column, score_change, score = RECORD.unpack_from(
+            self._map, self._first_record + index * RECORD.size)
+        if outcome == RAY_EXIT:
+            return Move('ray', (row, column), (exit_row, exit_column), score_change, score)
+        if outcome == RAY_HIT:
+            return Move('ray', (row, column), None, score_change, score)
+        return Move('guess', (row, column), outcome == GUESS_CORRECT, score_change, score)
+
+    def __iter__(self):
+        """Yields every Move in the log, in order."""
+
+        for index in range(0, self._move_count):
+            yield self.get_move(index)
+
+    def get_score(self, move_count):
+        """Accepts as a parameter a number of moves. Returns the score after that many moves, read from a single
+        record."""
+
+        if move_count == 0:
+            return STARTING_SCORE
+        return self.get_move(move_count - 1).score
+
+    def get_game(self, move_count=None):
+        """Accepts as an optional parameter a number of moves (default: every move in the log). Returns a
+        BlackBoxEngine in the state after that many moves. The recorded ray results are applied with play_ray, so no
+        ray is traced. Raises ValueError if the rebuilt score does not match the log."""
+
+        if move_count is None:
+            move_count = self._move_count
+        game = BlackBoxEngine(self._atom_list, size=self._size)
+        for index in range(0, move_count):
+            move = self.get_move(index)
+            if move.kind == 'ray':
+                game.play_ray(move.square[0], move.square[1], move.result)
+            else:
+                game.guess_atom(move.square[0], move.square[1])
+            if game.get_score() != move.score:
+                raise ValueError('Score after move ' + str(index) + ' does not match the log')
+        return game
+
+    def close(self):
+        """Accepts no parameters. Unmaps the log."""
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,349 @@
+# Description: asyncio game server for 'Black Box'. Keeps many game sessions of the headless BlackBoxEngine in memory
+#               and plays them over TCP, one JSON message per line. Also contains GameClient, a small client for
+#               local play and testing. Run 'python GameServer.py --help' for the options.
+
+import argparse
+import asyncio
+import json
+import secrets
+from collections import OrderedDict
+from BlackBoxEngine import BlackBoxEngine
+from Board import BOARD_SIZE, ATOM_COUNT
+from Instrumentation import Instrumentation
+
+# default address the server listens on
+HOST = '127.0.0.1'
+PORT = 8765
+
+# most sessions kept at once. A new game is refused while the server is full of sessions that are still in use.
+MAX_SESSIONS = 10000
+
+# seconds without a move before a session is dropped, and seconds between checks for idle sessions
+IDLE_TIMEOUT = 600
+EVICT_INTERVAL = 30
+
+# largest board a client may ask for, so each session uses a bounded amount of memory
+MAX_BOARD_SIZE = 16
+
+# longest request line accepted, in bytes
+MAX_MESSAGE = 1024
+
+
+def max_moves(size):
+    """Accepts as a parameter the board size. Returns the most shoot and guess moves a session may make: one ray per
+    entry square plus one guess per square inside the black box, which is more than any sensible game needs."""
+    return 4 * size + size * size
+
+
+class Session:
+    """One game on the server: the engine, its board size, a lock so moves from several connections are applied one
+    at a time, the time of the last move and the number of moves left."""
+
+    __slots__ = ('game', 'size', 'lock', 'last_used', 'moves_left')
+
+    def __init__(self, game, size, now):
+        """Accepts as parameters a BlackBoxEngine, its board size and the current event loop time."""
+
+        self.game = game
+        self.size = size
+        self.lock = asyncio.Lock()
+        self.last_used = now
+        self.moves_left = max_moves(size)
+
+
+class GameServer:
+    """Implementation of the Black Box game server. Sessions are kept in an OrderedDict from least to most recently
+    used, so idle sessions are found at the front without scanning the others. Each session holds a compact
+    (BitBoard) engine. Contains methods to handle a request message, create and look up sessions, drop idle
+    sessions, and serve TCP connections.
+
+    Requests and responses are JSON objects, one per line. Every request has an 'op':
+      {"op": "new", "seed": 1, "size": 8, "atoms": 5}          (all but op optional) -> "session"
+      {"op": "shoot", "session": ..., "row": 0, "column": 3}   -> "result": exit [row, column] or null for a hit
+      {"op": "guess", "session": ..., "row": 2, "column": 5}   -> "correct": true or false
+      {"op": "score", "session": ...}
+      {"op": "end", "session": ...}
+    Responses have "ok": true with the session's "score", "atoms_left" and "game_result" ('Win', 'Loss' or null),
+    or "ok": false with an "error" message. Guesses must be inside the black box, shoot and guess are refused once
+    the game has a result, and each session may make at most max_moves(size) of them, so a client cannot grow a
+    session's memory without bound."""
+
+    def __init__(self, max_sessions=MAX_SESSIONS, idle_timeout=IDLE_TIMEOUT, instrumentation=None):
+        """Accepts as optional parameters the most sessions to keep, the seconds a session may go without a move
+        before it is dropped, and an Instrumentation to report every game's ray shots to."""
+
+        self._max_sessions = max_sessions
+        self._idle_timeout = idle_timeout
+        self._sessions = OrderedDict()
+        self._evict_task = None
+        self._server = None
+        self._instrumentation = instrumentation
+
+    def session_count(self):
+        """Accepts no parameters. Returns the number of sessions in memory."""
+        return len(self._sessions)
+
+    def new_session(self, seed=None, size=BOARD_SIZE, atom_count=ATOM_COUNT):
+        """Accepts as optional parameters a random seed, the board size and the number of atoms. Creates a game
+        session and returns its id. Drops idle sessions first if the server is full. Raises ValueError if the board is
+        not allowed or the server is still full."""
+
+        if not 1 <= size <= MAX_BOARD_SIZE or not 1 <= atom_count <= size * size:
+            raise ValueError('board size must be 1 to ' + str(MAX_BOARD_SIZE) + ' with 1 to size * size atoms')
+        if len(self._sessions) >= self._max_sessions:
+            self.evict_idle()
+            if len(self._sessions) >= self._max_sessions:
+                raise ValueError('server is full')
+
+        session_id = secrets.token_hex(8)
+        game = BlackBoxEngine(compact=True, seed=seed, size=size, atom_count=atom_count,
+                              instrumentation=self._instrumentation)
+        self._sessions[session_id] = Session(game, size, asyncio.get_running_loop().time())
+        return session_id
+
+    def get_session(self, session_id):
+        """Accepts as a parameter a session id. Marks the session as just used and returns it. Raises ValueError if
+        there is no such session."""
+
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise ValueError('unknown session')
+        session.last_used = asyncio.get_running_loop().time()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def evict_idle(self):
+        """Accepts no parameters. Drops every session that has gone longer than the idle timeout without a move.
+        Returns the number dropped."""
+
+        oldest = asyncio.get_running_loop().time() - self._idle_timeout
+        dropped = 0
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_used > oldest or session.lock.locked():
+                break
+            del self._sessions[session_id]
+            dropped += 1
+        return dropped
+
+    async def handle_message(self, message):
+        """Accepts as a parameter a decoded request. Applies it and returns the response dictionary. Errors in the
+        request are returned as an error response rather than raised."""
+
+        try:
+            op = message.get('op')
+            if op == 'new':
+                session_id = self.new_session(_integer(message, 'seed', None), _integer(message, 'size', BOARD_SIZE),
+                                              _integer(message, 'atoms', ATOM_COUNT))
+                return self._state(session_id, self._sessions[session_id].game)
+
+            session_id = message.get('session')
+            session = self.get_session(session_id)
+            async with session.lock:
+                game = session.game
+                if op in ('shoot', 'guess'):
+                    if game.get_game_result() is not None:
+                        raise ValueError('game is over')
+                    if session.moves_left <= 0:
+                        raise ValueError('no moves left')
+                    row, column = _integer(message, 'row'), _integer(message, 'column')
+                if op == 'shoot':
+                    result = game.shoot_ray(row, column)
+                    if result is False:
+                        raise ValueError('not a legal entry square')
+                    session.moves_left -= 1
+                    return self._state(session_id, game, result=result)
+                if op == 'guess':
+                    if not (1 <= row <= session.size and 1 <= column <= session.size):
+                        raise ValueError('not a square inside the black box')
+                    correct = game.guess_atom(row, column)
+                    session.moves_left -= 1
+                    return self._state(session_id, game, correct=correct)
+                if op == 'score':
+                    return self._state(session_id, game)
+                if op == 'end':
+                    del self._sessions[session_id]
+                    return self._state(session_id, game)
+            raise ValueError('unknown op ' + repr(op))
+
+        except (ValueError, TypeError, AttributeError) as error:
+            return {'ok': False, 'error': str(error)}
+
+    def _state(self, session_id, game, **fields):
+        """Accepts as parameters a session id, its game and extra response fields. Returns a success response with
+        the game's score, atoms left and result."""
+
+        response = {'ok': True, 'session': session_id, 'score': game.get_score(), 'atoms_left': game.atoms_left(),
+                    'game_result': game.get_game_result()}
+        response.update(fields)
+        return response
+
+    async def handle_connection(self, reader, writer):
+        """Accepts as parameters the stream reader and writer of a client connection. Answers one request per line
+        until the client disconnects or sends a line that is too long."""
+
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    writer.write(b'{"ok": false, "error": "message too long"}\n')
+                    break
+
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    response = {'ok': False, 'error': 'message is not JSON'}
+                else:
+                    if isinstance(message, dict):
+                        response = await self.handle_message(message)
+                    else:
+                        response = {'ok': False, 'error': 'message is not a JSON object'}
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def evict_forever(self, interval=EVICT_INTERVAL):
+        """Accepts as an optional parameter the seconds between checks. Drops idle sessions until cancelled."""
+
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+
+    async def start(self, host=HOST, port=PORT):
+        """Accepts as optional parameters the address to listen on. Starts the TCP server and the idle session check.
+        Returns the asyncio.Server. Call stop to shut both down."""
+
+        self._server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_MESSAGE)
+        self._evict_task = asyncio.get_running_loop().create_task(self.evict_forever())
+        return self._server
+
+    async def stop(self):
+        """Accepts no parameters. Cancels the idle session check and closes the TCP server started by start. Open
+        connections are not closed. Does nothing if the server is not running."""
+
+        if self._evict_task is not None:
+            self._evict_task.cancel()
+            try:
+                await self._evict_task
+            except asyncio.CancelledError:
+                pass
+            self._evict_task = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+class GameClient:
+    """Client for GameServer over one TCP connection. Requests from several tasks on the same client are sent one at
+    a time. Each method returns the server's response dictionary."""
+
+    def __init__(self, reader, writer):
+        """Accepts as parameters the stream reader and writer of an open connection. Use GameClient.connect."""
+
+        self._reader = reader
+        self._writer = writer
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(cls, host=HOST, port=PORT):
+        """Accepts as optional parameters the server address. Opens a connection and returns a GameClient."""
+
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, message):
+        """Accepts as a parameter a request dictionary. Sends it and returns the decoded response."""
+
+        async with self._lock:
+            self._writer.write(json.dumps(message).encode() + b'\n')
+            await self._writer.drain()
+            return json.loads(await self._reader.readline())
+
+    async def new_game(self, seed=None, size=BOARD_SIZE, atom_count=ATOM_COUNT):
+        """Accepts as optional parameters a random seed, the board size and the number of atoms. Starts a game."""
+        return await self.request({'op': 'new', 'seed': seed, 'size': size, 'atoms': atom_count})
+
+    async def shoot_ray(self, session_id, row, column):
+        """Accepts as parameters a session id and the row and column of an entry square. Shoots a ray."""
+        return await self.request({'op': 'shoot', 'session': session_id, 'row': row, 'column': column})
+
+    async def guess_atom(self, session_id, row, column):
+        """Accepts as parameters a session id and the row and column of a square. Guesses an atom."""
+        return await self.request({'op': 'guess', 'session': session_id, 'row': row, 'column': column})
+
+    async def get_score(self, session_id):
+        """Accepts as a parameter a session id. Gets the score, atoms left and game result."""
+        return await self.request({'op': 'score', 'session': session_id})
+
+    async def end_game(self, session_id):
+        """Accepts as a parameter a session id. Ends the game and drops its session."""
+        return await self.request({'op': 'end', 'session': session_id})
+
+    async def close(self):
+        """Accepts no parameters. Closes the connection."""
+
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+def _integer(message, key, default=ValueError):
+    """Accepts as parameters a request, a key and an optional default. Returns the integer value of the key, or the
+    default if it is missing or null. Raises ValueError if the value is not an integer, or is missing with no
+    default."""
+
+    value = message.get(key)
+    if value is None:
+        if default is ValueError:
+            raise ValueError('missing ' + key)
+        return default
+    if type(value) is not int:
+        raise ValueError(key + ' must be an integer')
+    return value
+
+
+async def serve(host=HOST, port=PORT, max_sessions=MAX_SESSIONS, idle_timeout=IDLE_TIMEOUT, stats_path=None):
+    """Accepts as optional parameters the address to listen on, the most sessions, the idle timeout and a file path
+    for instrumentation statistics. Runs a GameServer until cancelled. With a statistics path, ray shots are
+    instrumented and the statistics are written to the file every EVICT_INTERVAL seconds."""
+
+    instrumentation = Instrumentation() if stats_path is not None else None
+    game_server = GameServer(max_sessions, idle_timeout, instrumentation)
+    await game_server.start(host, port)
+    try:
+        while True:
+            await asyncio.sleep(EVICT_INTERVAL)
+            if instrumentation is not None:
+                instrumentation.export(stats_path)
+    finally:
+        await game_server.stop()
+        if instrumentation is not None:
+            instrumentation.export(stats_path)          # final statistics when the server stops
+
+
+def main(argv=None):
+    """Reads the command line options and runs the server."""
+
+    parser = argparse.ArgumentParser(description='Serve Black Box games over TCP, one JSON message per line.')
+    parser.add_argument('--host', default=HOST, help='address to listen on')
+    parser.add_argument('--port', type=int, default=PORT, help='port to listen on')
+    parser.add_argument('--max-sessions', type=int, default=MAX_SESSIONS, help='most games kept at once')
+    parser.add_argument('--idle-timeout', type=float, default=IDLE_TIMEOUT,
+                        help='seconds without a move before a game is dropped')
+    parser.add_argument('--stats', help='file to write ray shot statistics to (default: no instrumentation)')
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_sessions, args.idle_timeout, args.stats))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
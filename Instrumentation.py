@@ -0,0 +1,135 @@
+# Description: Opt-in instrumentation for 'Black Box'. Class Instrumentation collects the steps, detours, reflections
+#               and trace time of every ray shot, and the time of every screen update, of the games it is passed to,
+#               and exports them as histograms to a JSON file.
+
+import heapq
+import json
+from collections import Counter, namedtuple
+from time import perf_counter
+
+# One ray shot. entry and exit are (row, column) squares (exit is None for a hit). steps is the number of squares
+# the ray moved, detours the number of 90 degree turns and reflections the number of reversals along its path.
+# seconds is the wall time of tracing the ray.
+ShotRecord = namedtuple('ShotRecord', ['layout', 'entry', 'status', 'exit', 'steps', 'detours', 'reflections',
+                                       'seconds'])
+
+# number of most expensive layouts reported, and number of layouts tracked before the cheapest half is dropped
+TOP_LAYOUTS = 20
+MAX_LAYOUTS = 10000
+
+
+class Instrumentation:
+    """Collects statistics from the games it is passed to (the instrumentation parameter of BlackBoxEngine and
+    BlackBoxGame). Games without it do not time or count anything. Keeps histograms of steps, detours, reflections
+    and shot times, totals for each entry square, the layouts with the most ray time, and a histogram of frame times.
+    Optional on_shot and on_frame callbacks are called with each ShotRecord and each frame time."""
+
+    def __init__(self, on_shot=None, on_frame=None):
+        """Accepts as optional parameters a function to call with each ShotRecord and a function to call with the
+        seconds taken by each screen update."""
+
+        self._on_shot = on_shot
+        self._on_frame = on_frame
+        self._shots = 0
+        self._steps = Counter()                         # histogram of steps per shot
+        self._detours = Counter()                       # histogram of detours per shot
+        self._reflections = Counter()                   # histogram of reflections per shot
+        self._shot_times = Counter()                    # histogram of shot time buckets (see _time_bucket)
+        self._entries = {}                              # entry square -> [shots, seconds, steps]
+        self._layouts = {}                              # layout -> seconds of all its shots
+        self._frames = 0
+        self._frame_times = Counter()                   # histogram of frame time buckets
+
+    def record_shot(self, layout, entry, board):
+        """Accepts as parameters the layout (a tuple of atom squares), the entry square and the game board of a shot.
+        Traces the ray, timing the trace and counting its turns (see trace_turns), and adds the shot to the
+        statistics (see add_shot). Returns the RayResult."""
+
+        start = perf_counter()
+        result, steps, detours, reflections = trace_turns(board, entry[0], entry[1])
+        seconds = perf_counter() - start
+        self.add_shot(ShotRecord(layout, entry, result.status, result.exit, steps, detours, reflections, seconds))
+        return result
+
+    def add_shot(self, record):
+        """Accepts as a parameter a ShotRecord. Adds the shot to the statistics and calls on_shot. Does not return
+        anything."""
+
+        self._shots += 1
+        self._steps[record.steps] += 1
+        self._detours[record.detours] += 1
+        self._reflections[record.reflections] += 1
+        self._shot_times[_time_bucket(record.seconds)] += 1
+
+        totals = self._entries.get(record.entry)
+        if totals is None:
+            totals = self._entries[record.entry] = [0, 0.0, 0]
+        totals[0] += 1
+        totals[1] += record.seconds
+        totals[2] += record.steps
+        self._layouts[record.layout] = self._layouts.get(record.layout, 0.0) + record.seconds
+        if len(self._layouts) > MAX_LAYOUTS:             # keep memory bounded over many games
+            self._layouts = dict(heapq.nlargest(MAX_LAYOUTS // 2, self._layouts.items(), key=lambda item: item[1]))
+
+        if self._on_shot is not None:
+            self._on_shot(record)
+
+    def record_frame(self, seconds):
+        """Accepts as a parameter the wall time of a screen update. Adds it to the frame time histogram and calls
+        on_frame. Does not return anything."""
+
+        self._frames += 1
+        self._frame_times[_time_bucket(seconds)] += 1
+        if self._on_frame is not None:
+            self._on_frame(seconds)
+
+    def get_summary(self):
+        """Accepts no parameters. Returns a dictionary of the statistics, ready to be written as JSON. Time
+        histograms are keyed by the upper bound of each bucket in microseconds (powers of two)."""
+
+        entries = {}
+        for (row, column), (shots, seconds, steps) in sorted(self._entries.items()):
+            entries[str(row) + ',' + str(column)] = {'shots': shots, 'mean_seconds': seconds / shots,
+                                                     'mean_steps': steps / shots}
+        layouts = heapq.nlargest(TOP_LAYOUTS, self._layouts.items(), key=lambda item: item[1])
+        return {
+            'shots': self._shots,
+            'steps': _histogram(self._steps),
+            'detours': _histogram(self._detours),
+            'reflections': _histogram(self._reflections),
+            'shot_microseconds': _histogram(self._shot_times),
+            'entries': entries,
+            'slowest_layouts': [{'atoms': [list(square) for square in layout], 'seconds': seconds}
+                                for layout, seconds in layouts],
+            'frames': self._frames,
+            'frame_microseconds': _histogram(self._frame_times),
+        }
+
+    def export(self, path):
+        """Accepts as a parameter a file path. Writes the summary to it as JSON. Does not return anything."""
+
+        with open(path, 'w') as output:
+            output.write(json.dumps(self.get_summary(), indent=2) + '\n')
+
+
+def trace_turns(board, row, column):
+    """Accepts as parameters a GameBoard (or BitBoard) and the row and column of a legal entry square. Traces the ray
+    with a turn function (see GameBoard.trace_ray), so every turn is counted: an edge case reflection, where the ray
+    never moves, and turns on the same square, which the path alone does not show. Returns a tuple of the RayResult
+    and the number of steps, detours (90 degree turns) and reflections (reversals)."""
+
+    turns = []
+    result = board.trace_ray(row, column, turns.append)
+    reflections = turns.count('Reflection')
+    return result, len(result.path) - 1, len(turns) - reflections, reflections
+
+
+def _time_bucket(seconds):
+    """Accepts as a parameter a time in seconds. Returns the upper bound of its histogram bucket: the smallest power
+    of two greater than the time in whole microseconds."""
+    return 1 << max(int(seconds * 1000000), 0).bit_length()
+
+
+def _histogram(counter):
+    """Accepts as a parameter a Counter. Returns it as a dictionary with string keys in increasing order."""
+    return {str(key): counter[key] for key in sorted(counter)}
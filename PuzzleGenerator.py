@@ -0,0 +1,282 @@
+# Description: Puzzle generator for 'Black Box'. Generates atom layouts whose ray signature (the result of a ray from
+#               every entry square) no other layout shares, so the puzzle has exactly one solution, and rates their
+#               difficulty. PuzzleIndex holds every such layout of the standard board once per symmetry class and
+#               needs numpy. Run 'python PuzzleGenerator.py --help' for the options.
+
+import argparse
+import json
+import sys
+from collections import namedtuple
+from itertools import combinations, islice
+from random import Random
+from Board import GameBoard, BOARD_SIZE, ATOM_COUNT, entry_squares
+from BlackBoxEngine import random_atom_list
+from Instrumentation import trace_turns
+from Solver import LayoutSolver, check_layout_count
+
+# A generated puzzle: the sorted list of (row, column) atom squares, the ray signature (see GameBoard.get_signature)
+# and the difficulty rating (see rate).
+Puzzle = namedtuple('Puzzle', ['atoms', 'signature', 'difficulty'])
+
+# difficulty points for each atom that no ray hits, on top of one point for each ray that turns
+HIDDEN_ATOM_POINTS = 8
+
+# layouts handled at once while building a PuzzleIndex
+INDEX_CHUNK_SIZE = 1 << 20
+
+# random layouts tried in a row, without finding a new one (or one in the difficulty range), before giving up
+MAX_ATTEMPTS = 1000
+
+
+def symmetries(size=BOARD_SIZE):
+    """Accepts as an optional parameter the number of rows and columns inside the black box. Returns a list of the 8
+    symmetries of the board (rotations and reflections) as functions of a (row, column) square, starting with the
+    identity. Each maps border squares to border squares, and ray results map the same way."""
+
+    last = size + 1
+    return [lambda row, column: (row, column),
+            lambda row, column: (column, last - row),
+            lambda row, column: (last - row, last - column),
+            lambda row, column: (last - column, row),
+            lambda row, column: (row, last - column),
+            lambda row, column: (last - row, column),
+            lambda row, column: (column, row),
+            lambda row, column: (last - column, last - row)]
+
+
+def canonical_layout(atom_list, size=BOARD_SIZE):
+    """Accepts as parameters a list of (row, column) atom squares and the optional board size. Returns the smallest
+    sorted tuple of atom squares among the layout's 8 symmetric copies, which is the same for all of them."""
+    return min(tuple(sorted(symmetry(row, column) for row, column in atom_list)) for symmetry in symmetries(size))
+
+
+def is_unique(atom_list, size=BOARD_SIZE):
+    """Accepts as parameters a list of (row, column) atom squares and the optional board size. Returns True if no
+    other layout with the same number of atoms has the same ray signature. Uses a LayoutSolver, so boards other than
+    the standard one can be checked. Raises ValueError if the board size and atom count have more than
+    Solver.MAX_LAYOUTS layouts (see Solver.check_layout_count)."""
+
+    table = GameBoard(atom_list, size).get_ray_table()
+    solver = LayoutSolver(len(atom_list), size)
+    for entry in entry_squares(size):
+        if solver.add_ray(entry, table[entry].exit) == 1:
+            return True
+    return False
+
+
+def rate(atom_list, size=BOARD_SIZE):
+    """Accepts as parameters a list of (row, column) atom squares and the optional board size. Returns the difficulty
+    rating of the layout: HIDDEN_ATOM_POINTS for each atom that no ray hits (it can only be found from the detours
+    and reflections it causes), plus one point for each ray that is detoured or reflected."""
+
+    board = GameBoard(atom_list, size)
+    hit_atoms = set()
+    turning_rays = 0
+    for row, column in entry_squares(size):
+        result, steps, detours, reflections = trace_turns(board, row, column)
+        if result.status == 'Hit':
+            hit_atoms.add(result.path[-1])
+        if detours or reflections:
+            turning_rays += 1
+    return HIDDEN_ATOM_POINTS * (len(set(atom_list)) - len(hit_atoms)) + turning_rays
+
+
+def make_puzzle(atom_list, size=BOARD_SIZE):
+    """Accepts as parameters a list of (row, column) atom squares and the optional board size. Returns its Puzzle."""
+
+    atoms = sorted(tuple(square) for square in atom_list)
+    return Puzzle(atoms, GameBoard(atoms, size).get_signature(), rate(atoms, size))
+
+
+class PuzzleIndex:
+    """Index of every atom layout of the standard 8 x 8 board with a unique ray signature, one layout for each
+    symmetry class. A layout is kept as a 64-bit mask with bit (row - 1) * 8 + column - 1 set for each atom. Building
+    the index simulates only the canonical layout of each symmetry class with BatchRays and gets the signatures of
+    its symmetric copies by relabelling the entry squares. Each signature is packed into a 32-byte key, and a layout
+    is unique when its smallest key among the 8 copies belongs to no other class and none of its own copies shares
+    its signature. Requires numpy."""
+
+    def __init__(self, masks, atom_count=ATOM_COUNT):
+        """Accepts as parameters a numpy array of layout masks and their number of atoms. Use build or load."""
+
+        self._masks = masks
+        self._atom_count = atom_count
+
+    @classmethod
+    def build(cls, atom_count=ATOM_COUNT, chunk_size=INDEX_CHUNK_SIZE):
+        """Accepts as optional parameters the number of atoms and the number of layouts handled at once. Builds the
+        index from every layout of that many atoms (7.6 million for 5 atoms, which takes a few tens of seconds).
+        Returns the PuzzleIndex."""
+
+        import numpy as np
+        from BatchRays import simulate_layouts, signature_keys, keys_less
+
+        entries = entry_squares()
+        squares = np.array([divmod(index, 8) for index in range(0, 64)]) + 1      # row and column of each bit
+        square_maps = []                    # interior square index of each square's copy, for each symmetry
+        entry_maps = []                     # entry index of each entry square's copy, for each symmetry
+        for symmetry in symmetries():
+            square_maps.append(np.array([(row - 1) * 8 + column - 1 for row, column in
+                                         (symmetry(row, column) for row, column in squares)], dtype=np.uint64))
+            entry_maps.append(np.array([entries.index(symmetry(row, column)) for row, column in entries]))
+
+        canonical_masks = []
+        canonical_keys = []
+        clean = []                          # no symmetric copy of the layout shares its signature
+        layouts = combinations(range(0, 64), atom_count)
+        while True:
+            chunk = np.fromiter((index for layout in islice(layouts, chunk_size) for index in layout), dtype=np.intp)
+            if chunk.size == 0:
+                break
+            chunk = chunk.reshape(-1, atom_count)
+
+            # keep the layouts that are the smallest mask among their copies
+            masks = np.stack([(np.uint64(1) << square_map[chunk]).sum(axis=1, dtype=np.uint64)
+                              for square_map in square_maps])
+            canonical = masks[0] == masks.min(axis=0)
+            chunk = chunk[canonical]
+            masks = masks[:, canonical]
+
+            codes = simulate_layouts(squares[chunk])
+            keys = [signature_keys(codes, entry_map) for entry_map in entry_maps]
+            best = keys[0]
+            ok = np.ones(len(chunk), dtype=bool)
+            for copy in range(1, 8):
+                same = (keys[copy] == keys[0]).all(axis=1)
+                ok &= ~same | (masks[copy] == masks[0])
+                best = np.where(keys_less(keys[copy], best)[:, None], keys[copy], best)
+
+            canonical_masks.append(masks[0])
+            canonical_keys.append(best)
+            clean.append(ok)
+
+        masks = np.concatenate(canonical_masks)
+        keys = np.concatenate(canonical_keys)
+        unique_keys, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+        keep = (counts[inverse.ravel()] == 1) & np.concatenate(clean)
+        return cls(masks[keep], atom_count)
+
+    @classmethod
+    def load(cls, path):
+        """Accepts as a parameter the path of an index saved with save. Returns the PuzzleIndex."""
+
+        import numpy as np
+        with np.load(path) as data:
+            return cls(data['masks'], int(data['atom_count']))
+
+    def save(self, path):
+        """Accepts as a parameter a file path. Saves the index to it in numpy's .npz format. Does not return
+        anything."""
+
+        import numpy as np
+        np.savez_compressed(path, masks=self._masks, atom_count=self._atom_count)
+
+    def get_atom_count(self):
+        """Accepts no parameters. Returns the number of atoms of every layout in the index."""
+        return self._atom_count
+
+    def __len__(self):
+        """Returns the number of layouts in the index."""
+        return len(self._masks)
+
+    def get_layout(self, index):
+        """Accepts as a parameter a position in the index. Returns the layout as a sorted list of (row, column) atom
+        squares."""
+
+        mask = int(self._masks[index])
+        return [(bit // 8 + 1, bit % 8 + 1) for bit in range(0, 64) if mask >> bit & 1]
+
+
+class PuzzleGenerator:
+    """Generates puzzles with exactly one solution. With a PuzzleIndex, layouts are drawn from the index and shown in
+    a random one of their 8 symmetric copies, so no layout has to be checked. Without one, random layouts are
+    checked with is_unique, which handles board sizes and atom counts with up to Solver.MAX_LAYOUTS layouts, and a
+    symmetry class is not given twice by the same generator."""
+
+    def __init__(self, index=None, size=BOARD_SIZE, atom_count=ATOM_COUNT, seed=None):
+        """Accepts as optional parameters a PuzzleIndex, the board size and number of atoms (used without an index),
+        and a random seed so the same seed always gives the same puzzles. Raises ValueError if there is no index and
+        the board size and atom count have too many layouts to check (see Solver.check_layout_count)."""
+
+        if index is None:
+            check_layout_count(size, atom_count)
+        self._index = index
+        self._size = size if index is None else BOARD_SIZE
+        self._atom_count = atom_count if index is None else index.get_atom_count()
+        self._rng = Random(seed)
+        self._seen = set()                              # canonical layouts already given without an index
+
+    def next_layout(self):
+        """Accepts no parameters. Returns the atom list of a new layout with a unique signature. Raises ValueError
+        if MAX_ATTEMPTS random layouts in a row were already given or have no unique signature, which happens when
+        the board has few layouts (or none) with a unique signature."""
+
+        if self._index is not None:
+            layout = self._index.get_layout(self._rng.randrange(len(self._index)))
+            symmetry = self._rng.choice(symmetries(self._size))
+            return sorted(symmetry(row, column) for row, column in layout)
+
+        for attempt in range(0, MAX_ATTEMPTS):
+            layout = random_atom_list(self._rng.getrandbits(64), self._size, self._atom_count)
+            canonical = canonical_layout(layout, self._size)
+            if canonical not in self._seen and is_unique(layout, self._size):
+                self._seen.add(canonical)
+                return sorted(layout)
+        raise ValueError('no new layout with a unique signature found in ' + str(MAX_ATTEMPTS) + ' tries')
+
+    def generate(self, count, min_difficulty=0, max_difficulty=None):
+        """Accepts as parameters the number of puzzles and an optional range of difficulty ratings. Returns a list of
+        that many Puzzles rated within the range. Raises ValueError if the range holds no possible rating, or if
+        MAX_ATTEMPTS layouts in a row are rated outside it (see also next_layout)."""
+
+        highest = HIDDEN_ATOM_POINTS * self._atom_count + len(entry_squares(self._size))
+        if min_difficulty > highest or (max_difficulty is not None and max_difficulty < max(min_difficulty, 0)):
+            raise ValueError('no puzzle can be rated from ' + str(min_difficulty) + ' to ' + str(max_difficulty))
+
+        puzzles = []
+        attempts = 0
+        while len(puzzles) < count:
+            puzzle = make_puzzle(self.next_layout(), self._size)
+            if puzzle.difficulty >= min_difficulty and (max_difficulty is None or puzzle.difficulty <= max_difficulty):
+                puzzles.append(puzzle)
+                attempts = 0
+            else:
+                attempts += 1
+                if attempts >= MAX_ATTEMPTS:
+                    raise ValueError('no puzzle rated from ' + str(min_difficulty) + ' to ' + str(max_difficulty) +
+                                     ' found in ' + str(MAX_ATTEMPTS) + ' tries')
+        return puzzles
+
+
+def main(argv=None):
+    """Reads the command line options and writes generated puzzles as JSON lines, or builds and saves an index."""
+
+    parser = argparse.ArgumentParser(description='Generate Black Box puzzles with exactly one solution.')
+    parser.add_argument('--count', type=int, default=10, help='number of puzzles')
+    parser.add_argument('--seed', type=int, default=None, help='random seed')
+    parser.add_argument('--size', type=int, default=BOARD_SIZE, help='rows and columns inside the black box')
+    parser.add_argument('--atoms', type=int, default=ATOM_COUNT, help='number of atoms')
+    parser.add_argument('--min-difficulty', type=int, default=0, help='lowest difficulty rating')
+    parser.add_argument('--max-difficulty', type=int, default=None, help='highest difficulty rating')
+    parser.add_argument('--index', help='PuzzleIndex file (.npz) to draw layouts from')
+    parser.add_argument('--build-index', help='build a PuzzleIndex of the standard board, save it here and exit')
+    args = parser.parse_args(argv)
+
+    if args.build_index:
+        index = PuzzleIndex.build(args.atoms)
+        index.save(args.build_index)
+        sys.stdout.write(str(len(index)) + ' layouts\n')
+        return
+
+    index = PuzzleIndex.load(args.index) if args.index else None
+    try:
+        generator = PuzzleGenerator(index, args.size, args.atoms, args.seed)
+        puzzles = generator.generate(args.count, args.min_difficulty, args.max_difficulty)
+    except ValueError as error:
+        parser.error(str(error))
+    for puzzle in puzzles:
+        sys.stdout.write(json.dumps(puzzle._asdict()) + '\n')
+
+
+if __name__ == '__main__':
+    main()
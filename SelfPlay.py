@@ -0,0 +1,231 @@
+# Description: Self-play harness for 'Black Box'. Plays many games with a shooting and guessing strategy against
+#               BlackBoxEngine over several processes and prints a summary of the scores, wins and rays per game.
+#               Run 'python SelfPlay.py --help' for the options.
+
+import argparse
+import json
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from random import Random
+from Board import BOARD_SIZE, ATOM_COUNT, entry_squares, interior_squares
+from BlackBoxEngine import BlackBoxEngine, random_atom_list
+from Solver import LayoutSolver
+
+# a game that has not ended after this many moves is stopped and counted as unfinished
+MAX_MOVES = 200
+
+
+class RandomStrategy:
+    """Strategy that shoots a fixed number of rays from random unused entry squares, then guesses random squares that
+    have not been guessed yet. Used as a baseline. A strategy is created for each game with a random.Random to make
+    its choices from and the board size and atom count. next_move returns ('ray', square) or ('guess', square), and
+    observe is told the result."""
+
+    rays = 8
+
+    def __init__(self, rng, size=BOARD_SIZE, atom_count=ATOM_COUNT):
+        """Accepts as parameters the random generator for this game, and the optional number of rows and columns
+        inside the black box and number of atoms. Shuffles the entry and interior squares."""
+
+        self._entries = list(entry_squares(size))
+        self._squares = interior_squares(size)
+        rng.shuffle(self._entries)
+        rng.shuffle(self._squares)
+        self._rays_shot = 0
+
+    def next_move(self, game):
+        """Accepts as a parameter the game being played. Returns the next move."""
+
+        if self._rays_shot < self.rays and self._entries:
+            self._rays_shot += 1
+            return 'ray', self._entries.pop()
+        return 'guess', self._squares.pop()
+
+    def observe(self, move, square, result):
+        """Accepts as parameters the move, its square and the result returned by the game. Does nothing."""
+
+
+class SolverStrategy:
+    """Strategy that shoots rays from random unused entry squares, tracking the consistent layouts with a
+    LayoutSolver, until only one layout is left. Then guesses the most likely atom squares."""
+
+    def __init__(self, rng, size=BOARD_SIZE, atom_count=ATOM_COUNT):
+        """Accepts as parameters the random generator for this game, and the optional number of rows and columns
+        inside the black box and number of atoms. Shuffles the entry squares. Raises ValueError if the board has too
+        many layouts for a LayoutSolver (see Solver.check_layout_count)."""
+
+        self._entries = list(entry_squares(size))
+        rng.shuffle(self._entries)
+        self._squares = interior_squares(size)
+        self._solver = LayoutSolver(atom_count, size)
+        self._used = set()
+        self._guessed = set()
+
+    def next_move(self, game):
+        """Accepts as a parameter the game being played. Returns the next move."""
+
+        while self._entries and not self._solver.is_solved():
+            entry = self._entries.pop()
+            if entry not in self._used:
+                return 'ray', entry
+
+        chances = self._solver.atom_chances()
+        square = max((square for square in self._squares if square not in self._guessed), key=chances.get)
+        self._guessed.add(square)
+        return 'guess', square
+
+    def observe(self, move, square, result):
+        """Accepts as parameters the move, its square and the result returned by the game. Adds rays to the
+        solver."""
+
+        if move == 'ray':
+            self._solver.add_ray(square, result)
+            self._used.add(square)
+            self._used.add(result)
+
+
+# strategies that can be chosen by name on the command line
+STRATEGIES = {'random': RandomStrategy, 'solver': SolverStrategy}
+
+
+def get_strategy(name):
+    """Accepts as a parameter a strategy name from STRATEGIES, or 'module:ClassName' for a strategy class defined
+    elsewhere. Returns the strategy class."""
+
+    if name in STRATEGIES:
+        return STRATEGIES[name]
+    if ':' not in name:
+        raise ValueError('Unknown strategy ' + repr(name) + '. Use one of ' + ', '.join(STRATEGIES) +
+                         ' or module:ClassName')
+    module_name, class_name = name.split(':', 1)
+    return getattr(import_module(module_name), class_name)
+
+
+def play_game(strategy_class, seed, size=BOARD_SIZE, atom_count=ATOM_COUNT):
+    """Accepts as parameters a strategy class, a seed, and the optional board size and atom count. Plays one game
+    with a layout and strategy choices drawn from the seed. Returns a tuple of the game result ('Win', 'Loss' or None
+    if unfinished), final score and number of rays shot."""
+
+    rng = Random(seed)
+    game = BlackBoxEngine(random_atom_list(rng.getrandbits(64), size, atom_count), size=size)
+    strategy = strategy_class(rng, size, atom_count)
+    rays = 0
+
+    for move_number in range(MAX_MOVES):
+        if game.get_game_result() is not None:
+            break
+        move, square = strategy.next_move(game)
+        if move == 'ray':
+            result = game.shoot_ray(square[0], square[1])
+            if result is not False:
+                rays += 1
+        else:
+            result = game.guess_atom(square[0], square[1])
+        strategy.observe(move, square, result)
+
+    return game.get_game_result(), game.get_score(), rays
+
+
+def play_games(strategy_name, first_seed, count, size=BOARD_SIZE, atom_count=ATOM_COUNT):
+    """Accepts as parameters a strategy name, the first seed, the number of games, and the optional board size and
+    atom count. Plays the games with seeds first_seed to first_seed + count - 1. Returns a partial summary (see
+    new_summary)."""
+
+    strategy_class = get_strategy(strategy_name)
+    summary = new_summary()
+    for seed in range(first_seed, first_seed + count):
+        result, score, rays = play_game(strategy_class, seed, size, atom_count)
+        summary['games'] += 1
+        summary['results'][str(result)] += 1
+        summary['scores'][score] += 1
+        summary['rays'][rays] += 1
+    return summary
+
+
+def new_summary():
+    """Accepts no parameters. Returns an empty summary: the number of games, and counters of game results, final
+    scores and rays per game."""
+
+    return {'games': 0, 'results': Counter(), 'scores': Counter(), 'rays': Counter()}
+
+
+def merge_summaries(summaries):
+    """Accepts as a parameter a list of partial summaries. Returns a single summary of all of them. The order of the
+    list does not matter, so results do not depend on which process finished first."""
+
+    total = new_summary()
+    for summary in summaries:
+        total['games'] += summary['games']
+        for key in ('results', 'scores', 'rays'):
+            total[key].update(summary[key])
+    return total
+
+
+def report(summary):
+    """Accepts as a parameter a summary. Returns a dictionary with the number of games, win rate, mean score and
+    rays per game, and the score and rays per game distributions, ready to be written as JSON."""
+
+    games = summary['games']
+    scores = summary['scores']
+    rays = summary['rays']
+    return {
+        'games': games,
+        'results': {result: summary['results'][result] for result in sorted(summary['results'])},
+        'win_rate': summary['results']['Win'] / games if games else 0.0,
+        'mean_score': sum(score * count for score, count in scores.items()) / games if games else 0.0,
+        'mean_rays': sum(ray * count for ray, count in rays.items()) / games if games else 0.0,
+        'scores': {str(score): scores[score] for score in sorted(scores)},
+        'rays': {str(ray): rays[ray] for ray in sorted(rays)},
+    }
+
+
+def run(strategy_name, games, seed=0, workers=None, chunk_size=1000, size=BOARD_SIZE, atom_count=ATOM_COUNT):
+    """Accepts as parameters a strategy name, the number of games, the first seed, the number of worker processes
+    (None for one per core, 1 to play in this process), the number of games per chunk, and the board size and atom
+    count. Splits the seeds into chunks, plays them on a ProcessPoolExecutor and returns the report of all games.
+    Raises ValueError for an unknown strategy or a board the strategy cannot play (such as a board with too many
+    layouts for SolverStrategy)."""
+
+    get_strategy(strategy_name)(Random(seed), size, atom_count)     # fail early, before starting any process
+    chunks = [(strategy_name, first, min(chunk_size, seed + games - first), size, atom_count)
+              for first in range(seed, seed + games, chunk_size)]
+
+    if workers == 1:
+        summaries = [play_games(*chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            summaries = list(executor.map(play_games, *zip(*chunks)))
+    return report(merge_summaries(summaries))
+
+
+def main(argv=None):
+    """Reads the command line options, runs the games and writes the report as JSON."""
+
+    parser = argparse.ArgumentParser(description='Play Black Box games with a strategy and summarize the results.')
+    parser.add_argument('--games', type=int, default=1000, help='number of games to play')
+    parser.add_argument('--strategy', default='random',
+                        help='strategy name (' + ', '.join(STRATEGIES) + ') or module:ClassName')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='games per chunk of work')
+    parser.add_argument('--size', type=int, default=BOARD_SIZE, help='rows and columns inside the black box')
+    parser.add_argument('--atoms', type=int, default=ATOM_COUNT, help='number of atoms in the black box')
+    parser.add_argument('--output', help='file to write the JSON report to (default: standard output)')
+    args = parser.parse_args(argv)
+
+    try:
+        results = run(args.strategy, args.games, args.seed, args.workers, args.chunk_size, args.size, args.atoms)
+    except ValueError as error:
+        parser.error(str(error))
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,381 @@
+# Description: Class LayoutSolver for 'Black Box'. Keeps track of the atom layouts that are still consistent with the
+#               rays shot so far, and suggests the next ray to shoot.
+
+from collections import Counter
+from itertools import combinations
+from math import comb, log2
+from random import Random
+from Board import GameBoard, BOARD_SIZE, ATOM_COUNT, entry_squares, border_mask, max_ray_steps
+
+# number of consistent layouts best_ray traces the unused rays on. If fewer layouts are left, all of them are used.
+SAMPLE_COUNT = 128
+
+# most layouts of a board size and atom count a LayoutSolver is made for. Its work grows with the number of layouts:
+# checking every ray of a layout takes about 0.1 s on the standard board (7.6 million layouts) and a few seconds at
+# this limit, while boards with many more layouts, such as 12 x 12 with 10 atoms, do not finish.
+MAX_LAYOUTS = 10 ** 9
+
+# best first ray for each board size and atom count, saved the first time it is worked out. The standard board's
+# opening ray is worked out over every layout, once, and kept here.
+_OPENING_RAYS = {(BOARD_SIZE, ATOM_COUNT): (0, 4)}
+
+# board geometry tables for each board size, built the first time a solver of that size is created
+_GEOMETRY = {}
+
+# kinds of decision tree node: a result, a test that several squares are all empty, a test of one square
+_LEAF, _CLEAR, _SQUARE = 0, 1, 2
+
+
+class LayoutSolver:
+    """Implementation of a solver for the Black Box game. The layouts consistent with the observed rays are kept as a
+    list of disjoint cells. A cell is a pair of bitboards (bit row * (size + 2) + column) of squares known to hold an
+    atom and squares known to be empty, and stands for every layout that places the remaining atoms on its other
+    squares. A cell with all of its atoms known marks every other square empty. Each new ray splits the cells by the
+    squares it depends on and drops the parts that give a different result, so the set shrinks after each shot
+    without being recomputed. Contains methods to add a ray, count the layouts, get the chance of an atom on each
+    square, list the layouts and suggest the next ray."""
+
+    def __init__(self, atom_count=ATOM_COUNT, size=BOARD_SIZE):
+        """Accepts as optional parameters the number of atoms in the black box and its number of rows and columns.
+        Initializes the solver with every layout of that many atoms. Raises ValueError if there are more than
+        MAX_LAYOUTS of them (see check_layout_count)."""
+
+        check_layout_count(size, atom_count)
+        self._atom_count = atom_count
+        self._size = size
+        self._width = size + 2
+        self._border, self._interior, self._entries, self._needed, self._side = _geometry(size)
+        self._step_limit = max_ray_steps(size)
+        self._cells = [(0, 0)]
+        self._count = comb(size * size, atom_count)     # number of layouts in the cells
+        self._rays = {}
+        self._trees = {}                                # decision tree of the ray from each entry square
+
+    def add_ray(self, entry, exit_square):
+        """Accepts as parameters the (row, column) entry square of a ray and the result returned by shoot_ray: the
+        (row, column) exit square (the entry square for a reflection), or None for a hit. Removes the layouts that
+        would give a different result. Returns the number of layouts left."""
+
+        entry = tuple(entry)
+        if exit_square is not None:
+            exit_square = tuple(exit_square)
+        if entry in self._rays:
+            return self.count()
+
+        self._rays[entry] = exit_square
+        if exit_square is not None and exit_square != entry:
+            self._rays[exit_square] = entry             # a ray path is reversible
+
+        cells = self._split(entry, self._cells, exit_square)
+        self._cells = []
+        self._count = 0
+        for atoms, empty in cells:
+            weight = self._weight(atoms, empty)
+            if weight:
+                self._cells.append((atoms, empty))
+                self._count += weight
+        return self._count
+
+    def count(self):
+        """Accepts no parameters. Returns the number of layouts consistent with the rays added so far."""
+        return self._count
+
+    def is_solved(self):
+        """Accepts no parameters. Returns True if exactly one layout is consistent with the rays added so far."""
+        return self.count() == 1
+
+    def get_layouts(self, limit=None):
+        """Accepts as an optional parameter the largest number of layouts to return. Returns a list of the consistent
+        layouts, each a sorted list of (row, column) atom positions."""
+
+        layouts = []
+        for atoms, empty in self._cells:
+            known = _squares(atoms, self._width)
+            free = _squares(self._interior & ~atoms & ~empty, self._width)
+            for rest in combinations(free, self._atom_count - len(known)):
+                if limit is not None and len(layouts) >= limit:
+                    return layouts
+                layouts.append(sorted(known + list(rest)))
+        return layouts
+
+    def atom_chances(self):
+        """Accepts no parameters. Returns a dictionary mapping each (row, column) square inside the black box to the
+        fraction of consistent layouts with an atom on that square."""
+
+        totals = dict.fromkeys(_squares(self._interior, self._width), 0)
+        layout_total = 0
+        for atoms, empty in self._cells:
+            free_mask = self._interior & ~atoms & ~empty
+            free = free_mask.bit_count()
+            left = self._atom_count - atoms.bit_count()
+            weight = comb(free, left)
+            layout_total += weight
+            for square in _squares(atoms, self._width):
+                totals[square] += weight
+            if free and left:
+                share = comb(free - 1, left - 1)
+                for square in _squares(free_mask, self._width):
+                    totals[square] += share
+
+        if layout_total == 0:
+            return totals
+        return {square: total / layout_total for square, total in totals.items()}
+
+    def best_ray(self, sample_count=SAMPLE_COUNT, seed=0):
+        """Accepts as optional parameters the number of consistent layouts to look at and the seed they are drawn
+        with. Returns the (row, column) entry square of the unused ray whose result is expected to tell the most
+        about the layout (the largest entropy of its result over the layouts looked at), or None if the layout is
+        already known or no unused ray tells those layouts apart. If more than sample_count layouts are consistent,
+        sample_count of them are drawn at random with the seed, so the time taken does not depend on how many are
+        left and the same rays always give the same suggestion."""
+
+        if self.count() <= 1:
+            return None
+        if not self._rays and (self._size, self._atom_count) in _OPENING_RAYS:
+            return _OPENING_RAYS[(self._size, self._atom_count)]
+
+        if self.count() <= sample_count:
+            layouts = self.get_layouts()
+        else:
+            layouts = self._sample_layouts(sample_count, Random(seed))
+        boards = [GameBoard(layout, self._size) for layout in layouts]
+
+        best_entry = None
+        best_entropy = 0.0
+        for entry in self._entries:
+            if entry in self._rays:
+                continue
+            weights = Counter(board.get_ray_result(entry[0], entry[1]).exit for board in boards).values()
+            total = len(boards)
+            entropy = -sum(weight / total * log2(weight / total) for weight in weights)
+            if entropy > best_entropy:
+                best_entry = entry
+                best_entropy = entropy
+
+        if not self._rays:
+            _OPENING_RAYS[(self._size, self._atom_count)] = best_entry     # the first ray only depends on these
+        return best_entry
+
+    def _sample_layouts(self, sample_count, rng):
+        """Accepts as parameters the number of layouts to draw and a random generator. Returns a list of that many
+        consistent layouts (lists of (row, column) atom positions), each drawn with the same chance."""
+
+        cells = self._cells
+        weights = [self._weight(atoms, empty) for atoms, empty in cells]
+        layouts = []
+        for atoms, empty in rng.choices(cells, weights, k=sample_count):
+            free = _squares(self._interior & ~atoms & ~empty, self._width)
+            layouts.append(_squares(atoms, self._width) + rng.sample(free, self._atom_count - atoms.bit_count()))
+        return layouts
+
+    def _weight(self, atoms, empty):
+        """Accepts as parameters the known atom and known empty bitboards of a cell. Returns the number of layouts in
+        the cell."""
+
+        free = (self._interior & ~atoms & ~empty).bit_count()
+        return comb(free, self._atom_count - atoms.bit_count())
+
+    def _split(self, entry, cells, target):
+        """Accepts as parameters an entry square, a list of (atoms, empty) cells and a ray result ((row, column) exit
+        square, or None for a hit). Follows each cell down the decision tree of the ray from that entry square, taking
+        both branches wherever the ray depends on a square the cell does not know. A branch that ends at once in
+        another result is not followed. Returns the list of cells that give the target result."""
+
+        root = self._trees.get(entry)
+        if root is None:
+            root = self._trees[entry] = self._build_node(entry, _start_state(entry, self._size))
+
+        atom_count = self._atom_count
+        interior = self._interior
+        build = self._build_node
+        results = []
+        stack = [(root, atoms, empty) for atoms, empty in cells]
+        pop = stack.pop
+        push = stack.append
+        while stack:
+            node, atoms, empty = pop()
+
+            kind = node[0]
+            while kind != _LEAF:
+                value = node[1]
+                if kind == _CLEAR:
+                    index = 2 if value & empty == value else 3
+                elif atoms & value:
+                    index = 2
+                elif empty & value:
+                    index = 3
+                else:
+                    # square not known: follow the atom branch later and the empty branch now. A cell with all of
+                    # its atoms known has every other square marked empty, so it never gets here.
+                    if node[4] is not None:
+                        child = node[2]
+                        if child is None:
+                            child = node[2] = build(entry, node[4])
+                        if child[0] != _LEAF or child[1] == target:
+                            with_atom = atoms | value
+                            if with_atom.bit_count() == atom_count:
+                                push((child, with_atom, interior & ~with_atom))
+                            else:
+                                push((child, with_atom, empty))
+                    empty |= value
+                    index = 3
+
+                child = node[index]
+                if child is None:
+                    child = node[index] = build(entry, node[index + 2])
+                node = child
+                kind = node[0]
+
+            if node[1] == target:
+                results.append((atoms, empty))
+        return results
+
+    def _build_node(self, entry, state):
+        """Accepts as parameters an entry square and a ray state (square, direction, atoms, empty, atom total, steps,
+        checked), where atoms and empty are the squares known on the way to this point of the tree. Traces the ray
+        like GameBoard.trace_ray until its result is known or it depends on squares that are not known yet. Returns
+        a decision tree node: [_LEAF, result], [_CLEAR, mask, ...] if the ray moves straight on when every square in
+        mask is empty, or [_SQUARE, square bit, ...] for a single square. Branch nodes hold the yes and no children
+        (built later) and the ray states to build them from."""
+
+        ray, direction, atoms, empty, atom_total, steps, checked = state
+        width = self._width
+        start = entry[0] * width + entry[1]
+        border = self._border
+        needed = self._needed
+        stride = 2 * width + 1
+
+        while steps < self._step_limit:
+            ahead = ray + direction
+
+            # check if ray is exiting 'black box'
+            if border >> ahead & 1:
+                return [_LEAF, divmod(ahead, width)]
+
+            # move straight on if the next square and both squares beside it are known to be empty
+            open_squares = needed[ray * stride + direction + width] & ~empty
+            if not open_squares:
+                ray = ahead
+                steps += 1
+                checked = False
+                continue
+
+            # ask if all of the squares that are not known yet are empty (a single square is asked about below)
+            if not checked and not open_squares & atoms and open_squares & (open_squares - 1):
+                return [_CLEAR, open_squares, None, None,
+                        (ahead, direction, atoms, empty | open_squares, atom_total, steps + 1, False),
+                        (ray, direction, atoms, empty, atom_total, steps, True)]
+
+            # squares the next move depends on: the sides first on the entry square (edge case reflection),
+            # otherwise the next square first (a hit ignores the sides)
+            side = self._side[direction + width]
+            if ray == start:
+                order = (ahead + side, ahead - side, ahead)
+            else:
+                order = (ahead, ahead + side, ahead - side)
+
+            for square in order:
+                if atoms >> square & 1:
+                    if square == ahead or ray == start:
+                        break
+                elif not empty >> square & 1:
+                    bit = 1 << square
+                    atom_state = None
+                    if atom_total < self._atom_count:
+                        atom_state = (ray, direction, atoms | bit, empty, atom_total + 1, steps, True)
+                    return [_SQUARE, bit, None, None, atom_state,
+                            (ray, direction, atoms, empty | bit, atom_total, steps, True)]
+
+            side_a = atoms >> (ahead + side) & 1
+            side_b = atoms >> (ahead - side) & 1
+
+            # check for edge case reflection
+            if (side_a or side_b) and ray == start:
+                return [_LEAF, entry]
+
+            # check for hit
+            if atoms >> ahead & 1:
+                return [_LEAF, None]
+
+            if side_a and side_b:                       # reflection, reverse direction
+                direction = -direction
+            elif side_a:                                # detour away from the atom
+                direction = -side
+            else:
+                direction = side
+            steps += 1
+            checked = False
+
+        raise RuntimeError('Ray from ' + str(entry) + ' did not finish')
+
+
+def check_layout_count(size, atom_count):
+    """Accepts as parameters the number of rows and columns inside the black box and the number of atoms. Raises
+    ValueError if they have more than MAX_LAYOUTS layouts, which a LayoutSolver cannot narrow down in a reasonable
+    time. Does not return anything."""
+
+    if comb(size * size, atom_count) > MAX_LAYOUTS:
+        raise ValueError('a ' + str(size) + ' x ' + str(size) + ' board with ' + str(atom_count) + ' atoms has too '
+                         'many layouts for the solver')
+
+
+def _geometry(size):
+    """Accepts as a parameter the number of rows and columns inside the black box. Returns the border bitboard,
+    interior bitboard, entry squares, needed square masks (see _needed_masks) and a list of the step perpendicular to
+    each direction, indexed by direction + size + 2. The tables are built once per size."""
+
+    if size not in _GEOMETRY:
+        width = size + 2
+        border = border_mask(size)
+        side = [0] * (2 * width + 1)
+        side[width - 1], side[width + 1], side[0], side[2 * width] = -width, width, -1, 1
+        _GEOMETRY[size] = (border, ((1 << (width * width)) - 1) & ~border, entry_squares(size),
+                           _needed_masks(width, side), side)
+    return _GEOMETRY[size]
+
+
+def _start_state(entry, size=BOARD_SIZE):
+    """Accepts as parameters an entry square and the number of rows and columns inside the black box. Returns the
+    ray state at the root of its decision tree."""
+
+    row, column = entry
+    width = size + 2
+    if column == 0:
+        direction = 1
+    elif column == width - 1:
+        direction = -1
+    elif row == 0:
+        direction = width
+    else:
+        direction = -width
+    return row * width + column, direction, 0, _geometry(size)[0], 0, 0, False
+
+
+def _needed_masks(width, side):
+    """Accepts as parameters the width of the board (including the border) and the perpendicular step table.
+    Returns a list indexed by square * (2 * width + 1) + direction + width of the bitboard of the next square and the
+    two squares beside it, for a ray on square moving in direction (+/-1 along a row, +/-width along a column)."""
+
+    area = width * width
+    stride = 2 * width + 1
+    masks = [-1] * (area * stride)
+    for square in range(0, area):
+        for direction in (1, -1, width, -width):
+            ahead = square + direction
+            step = side[direction + width]
+            if 0 <= ahead - abs(step) and ahead + abs(step) < area:      # otherwise never reached
+                masks[square * stride + direction + width] = 1 << ahead | 1 << (ahead + step) | 1 << (ahead - step)
+    return masks
+
+
+def _squares(mask, width=BOARD_SIZE + 2):
+    """Accepts as parameters a bitboard and the width of the board (including the border). Returns a list of the
+    (row, column) squares set in it."""
+
+    squares = []
+    while mask:
+        low = mask & -mask
+        squares.append(divmod(low.bit_length() - 1, width))
+        mask ^= low
+    return squares
+
@@ -0,0 +1,2 @@
+# Description: pytest configuration. Keeps the repository root on the import path, so the tests in tests/ can
+#               import the game modules when run with a plain "pytest".
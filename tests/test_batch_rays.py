@@ -0,0 +1,35 @@
+# Description: Tests of BatchRays against GameBoard. Skipped if numpy is not installed.
+
+import pytest
+from Board import GameBoard, ENTRY_SQUARES
+
+np = pytest.importorskip('numpy')
+from BatchRays import HIT, keys_less, random_layouts, signature_keys, simulate_layouts
+
+
+def test_matches_get_signature():
+    positions = random_layouts(2000, seed=0)
+    codes = simulate_layouts(positions, chunk_size=300)
+    for layout, layout_codes in zip(positions, codes):
+        board = GameBoard([(int(row), int(column)) for row, column in layout])
+        exits = tuple(None if code == HIT else ENTRY_SQUARES[code] for code in layout_codes)
+        assert exits == board.get_signature()
+
+
+def test_atom_counts():
+    for atoms in (1, 4, 8):
+        positions = random_layouts(200, atoms, seed=atoms)
+        codes = simulate_layouts(positions)
+        for layout, layout_codes in zip(positions, codes):
+            board = GameBoard([(int(row), int(column)) for row, column in layout])
+            assert tuple(None if code == HIT else ENTRY_SQUARES[code] for code in layout_codes) == \
+                board.get_signature()
+
+
+def test_keys_sort_like_signatures():
+    codes = simulate_layouts(random_layouts(500, seed=1))
+    keys = signature_keys(codes)
+    signatures = [tuple(code + 1 for code in layout_codes) for layout_codes in codes.tolist()]
+    less = keys_less(keys[:-1], keys[1:])
+    for first, (signature, other) in enumerate(zip(signatures, signatures[1:])):
+        assert less[first] == (signature < other)
@@ -0,0 +1,70 @@
+# Description: Tests of ray tracing in Board.py. The expected results were produced by the original recursive ray
+#               movers, so they check that GameBoard.trace_ray still plays the same game.
+
+import pytest
+from BlackBoxEngine import random_atom_list
+from Board import GameBoard, BitBoard, ENTRY_SQUARES
+
+# (atoms, {entry square: (status, exit square)}) for the special cases of the rules
+CASES = [
+    # atom beside the first square is an edge case reflection, even when the first square holds an atom
+    ([(1, 1), (1, 2)], {(0, 1): ('Reflection', (0, 1)), (0, 2): ('Reflection', (0, 2)), (1, 0): ('Hit', None),
+                        (2, 0): ('Reflection', (2, 0))}),
+    # atoms on both sides of the square ahead reflect the ray back the way it came
+    ([(3, 3), (3, 5)], {(0, 4): ('Reflection', (0, 4)), (9, 4): ('Reflection', (9, 4)), (4, 0): ('Exit', (9, 2))}),
+    # single detours, and hits straight ahead
+    ([(5, 5)], {(0, 4): ('Exit', (4, 0)), (9, 6): ('Exit', (6, 9)), (4, 9): ('Exit', (0, 6)), (0, 5): ('Hit', None),
+                (5, 0): ('Hit', None)}),
+    # detours followed by a reflection that brings the ray back out of its entry square
+    ([(4, 8), (6, 3), (2, 5), (2, 4), (4, 5)], {(0, 7): ('Reflection', (0, 7)), (5, 9): ('Reflection', (5, 9)),
+                                                (0, 6): ('Exit', (1, 9))}),
+    # two detours turn the ray back to the border it entered from
+    ([(8, 2), (8, 5), (7, 1), (4, 3), (2, 5)], {(3, 9): ('Exit', (7, 9)), (7, 9): ('Exit', (3, 9)),
+                                                (9, 1): ('Reflection', (9, 1))}),
+    ([(1, 4), (1, 3), (1, 2), (7, 1), (4, 4)], {(2, 9): ('Exit', (3, 9)), (0, 1): ('Reflection', (0, 1))}),
+]
+
+# (atoms, signature in ENTRY_SQUARES order) of whole layouts
+SIGNATURES = [
+    ([(8, 2), (8, 5), (7, 1), (4, 3), (2, 5)],
+     (None, (3, 0), None, (1, 0), None, (1, 9), (9, 7), (9, 8), (9, 1), None, (9, 3), (9, 4), None, (9, 6), (0, 7),
+      (0, 8), (0, 4), None, (0, 2), None, (6, 9), (6, 0), None, (8, 0), (0, 6), None, (7, 9), None, None, (5, 0),
+      (3, 9), None)),
+    ([(8, 7), (1, 4), (7, 2), (7, 8), (1, 1)],
+     (None, (0, 2), (0, 3), None, (0, 5), None, None, None, (8, 0), None, None, None, (2, 9), (9, 6), None, (9, 8),
+      None, (2, 0), (3, 9), (4, 9), (5, 9), None, None, (9, 1), None, (9, 5), (3, 0), (4, 0), (5, 0), (6, 9), None,
+      (8, 9))),
+]
+
+
+@pytest.mark.parametrize('board_class', [GameBoard, BitBoard])
+@pytest.mark.parametrize('atoms, expected', CASES)
+def test_trace_ray_cases(board_class, atoms, expected):
+    board = board_class(atoms)
+    for (row, column), (status, exit_square) in expected.items():
+        result = board.trace_ray(row, column)
+        assert (result.status, result.exit) == (status, exit_square), (row, column)
+        assert result.path[0] == (row, column)
+
+
+@pytest.mark.parametrize('atoms, signature', SIGNATURES)
+def test_signature(atoms, signature):
+    assert GameBoard(atoms).get_signature() == signature
+
+
+def test_cached_results_match_traced():
+    for seed in range(0, 20):
+        board = GameBoard(random_atom_list(seed))
+        table = board.get_ray_table()
+        for row, column in ENTRY_SQUARES:
+            assert table[(row, column)][:2] == board.trace_ray(row, column)[:2]
+
+
+@pytest.mark.parametrize('size, atom_count', [(8, 5), (5, 3), (12, 9)])
+def test_bit_board_matches_game_board(size, atom_count):
+    for seed in range(0, 50):
+        atoms = random_atom_list(seed, size, atom_count)
+        board = GameBoard(atoms, size)
+        bit_board = BitBoard(atoms, size)
+        assert bit_board.get_ray_table() == board.get_ray_table()
+        assert bit_board.get_board() == board.get_board()
@@ -0,0 +1,34 @@
+# Description: Tests of BlackBoxEngine scoring: squares and guesses that were already charged are not charged again.
+
+from BlackBoxEngine import BlackBoxEngine, STARTING_SCORE
+
+ATOMS = [(1, 6), (5, 2), (7, 2), (7, 6), (8, 7)]
+
+
+def test_ray_through_used_squares_is_free():
+    game = BlackBoxEngine(ATOMS)
+    exit_square = game.shoot_ray(0, 1)
+    assert exit_square is not None and exit_square != (0, 1)
+    assert game.get_score() == STARTING_SCORE - 2
+
+    assert game.shoot_ray(exit_square[0], exit_square[1]) == (0, 1)     # back along the same path
+    assert game.shoot_ray(0, 1) == exit_square
+    assert game.get_score() == STARTING_SCORE - 2
+
+
+def test_reflection_is_charged_once():
+    game = BlackBoxEngine(ATOMS)
+    assert game.shoot_ray(0, 5) == (0, 5)                               # edge case reflection
+    assert game.get_score() == STARTING_SCORE - 1
+
+
+def test_repeated_guesses_are_free():
+    game = BlackBoxEngine(ATOMS)
+    assert game.guess_atom(4, 4) is False
+    assert game.guess_atom(4, 4) is False
+    assert game.get_score() == STARTING_SCORE - 5
+
+    assert game.guess_atom(5, 2) is True
+    assert game.guess_atom(5, 2) is True
+    assert game.get_score() == STARTING_SCORE - 5
+    assert game.atoms_left() == len(ATOMS) - 1
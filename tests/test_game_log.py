@@ -0,0 +1,81 @@
+# Description: Tests of GameLog: a logged game is read back move by move and rebuilt after any move, a cut-off log
+#               keeps its complete moves, moves are on disk before the log is closed, and files that are not game logs
+#               are refused.
+
+import pytest
+from BlackBoxEngine import BlackBoxEngine, STARTING_SCORE
+from GameLog import GameLogWriter, GameLogReader, HEADER, MAGIC, VERSION, RECORD
+
+ATOMS = [(1, 6), (5, 2), (7, 2), (7, 6), (8, 7)]
+
+# moves of the logged game: rays (an exit, a repeat, an edge case reflection and a hit) and wrong, repeated and
+# correct guesses
+MOVES = [('ray', (0, 1)), ('ray', (0, 1)), ('ray', (0, 5)), ('ray', (5, 0)), ('guess', (4, 4)), ('guess', (4, 4)),
+         ('guess', (5, 2)), ('ray', (9, 3))]
+
+
+def play(game):
+    """Plays MOVES on game. Returns the list of (result, score) after each move."""
+
+    played = []
+    for kind, (row, column) in MOVES:
+        result = game.shoot_ray(row, column) if kind == 'ray' else game.guess_atom(row, column)
+        played.append((result, game.get_score()))
+    return played
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / 'game.bbl'
+    with GameLogWriter(path) as log:
+        played = play(BlackBoxEngine(ATOMS, log=log))
+
+    with GameLogReader(path) as reader:
+        assert reader.get_size() == 8
+        assert reader.get_atom_list() == ATOMS
+        assert len(reader) == len(MOVES)
+        assert [(move.kind, move.square) for move in reader] == MOVES
+        assert [(move.result, move.score) for move in reader] == played
+        assert reader.get_move(-1) == reader.get_move(len(MOVES) - 1)
+        assert reader.get_move(-len(MOVES)) == reader.get_move(0)
+        with pytest.raises(IndexError):
+            reader.get_move(-len(MOVES) - 1)
+
+        assert reader.get_score(0) == STARTING_SCORE
+        for count in (0, 1, 3, 6, len(MOVES)):
+            game = reader.get_game(count)
+            expected = played[count - 1][1] if count else STARTING_SCORE
+            assert reader.get_score(count) == expected
+            assert game.get_score() == expected
+        assert reader.get_game().atoms_left() == len(ATOMS) - 1
+
+
+def test_partial_record_is_ignored(tmp_path):
+    path = tmp_path / 'game.bbl'
+    with GameLogWriter(path) as log:
+        play(BlackBoxEngine(ATOMS, log=log))
+    data = path.read_bytes()
+    path.write_bytes(data[:-RECORD.size // 2])          # cut in the middle of the last move
+
+    with GameLogReader(path) as reader:
+        assert len(reader) == len(MOVES) - 1
+        assert reader.get_game().get_score() == reader.get_move(-1).score
+
+
+@pytest.mark.parametrize('header', [HEADER.pack(b'XXXX', VERSION, 8, 0), HEADER.pack(MAGIC, VERSION + 1, 8, 0),
+                                    b'BB'])
+def test_bad_header(tmp_path, header):
+    path = tmp_path / 'bad.bbl'
+    path.write_bytes(header)
+    with pytest.raises(ValueError):
+        GameLogReader(path)
+
+
+def test_moves_are_written_before_close(tmp_path):
+    path = tmp_path / 'game.bbl'
+    log = GameLogWriter(path)
+    game = BlackBoxEngine(ATOMS, log=log)
+    game.shoot_ray(0, 1)
+    game.guess_atom(4, 4)
+    with GameLogReader(path) as reader:                 # as if the process had been killed here
+        assert [(move.kind, move.square) for move in reader] == [('ray', (0, 1)), ('guess', (4, 4))]
+    log.close()
@@ -0,0 +1,74 @@
+# Description: Tests of the limits GameServer puts on a session's moves, driven through handle_message, and of a game
+#               played with GameClient over TCP.
+
+import asyncio
+from GameServer import GameServer, GameClient, MAX_MESSAGE, max_moves
+
+
+def play(messages):
+    """Returns the responses of a new GameServer to a 'new' request for a seeded 5 x 5 game with 3 atoms followed by
+    the given requests, each with the session id filled in."""
+
+    async def run():
+        server = GameServer()
+        response = await server.handle_message({'op': 'new', 'seed': 4, 'size': 5, 'atoms': 3})
+        session_id = response['session']
+        return [await server.handle_message(dict(message, session=session_id)) for message in messages]
+
+    return asyncio.run(run())
+
+
+def test_guess_must_be_inside_the_black_box():
+    for row, column in [(0, 3), (6, 2), (1000, -1), (3, 0)]:
+        response = play([{'op': 'guess', 'row': row, 'column': column}])[0]
+        assert response == {'ok': False, 'error': 'not a square inside the black box'}
+    assert play([{'op': 'guess', 'row': 3, 'column': 3}])[0]['ok']
+
+
+def test_no_moves_after_the_game_is_over():
+    wrong = [{'op': 'guess', 'row': row, 'column': column} for row in range(1, 6) for column in range(1, 6)]
+    responses = play(wrong + [{'op': 'shoot', 'row': 0, 'column': 1}])
+    over = [index for index, response in enumerate(responses) if response.get('game_result') is not None][0]
+    assert all(response == {'ok': False, 'error': 'game is over'} for response in responses[over + 1:])
+    assert over + 1 < len(responses)
+
+
+def test_moves_are_capped():
+    responses = play([{'op': 'shoot', 'row': 0, 'column': 1}] * (max_moves(5) + 3))
+    assert all(response['ok'] for response in responses[:max_moves(5)])
+    assert all(response == {'ok': False, 'error': 'no moves left'} for response in responses[max_moves(5):])
+
+
+def test_game_over_tcp():
+    async def run():
+        server = GameServer()
+        tcp_server = await server.start('127.0.0.1', 0)
+        port = tcp_server.sockets[0].getsockname()[1]
+        try:
+            client = await GameClient.connect('127.0.0.1', port)
+            session_id = (await client.new_game(seed=4, size=5, atom_count=3))['session']
+            shot = await client.shoot_ray(session_id, 0, 1)
+            guess = await client.guess_atom(session_id, 3, 3)
+            score = await client.get_score(session_id)
+            ended = await client.end_game(session_id)
+            gone = await client.get_score(session_id)
+            await client.close()
+
+            client = await GameClient.connect('127.0.0.1', port)
+            client._writer.write(b'x' * (MAX_MESSAGE * 2) + b'\n')
+            too_long = await client._reader.readline()
+            after = await client._reader.readline()
+            await client.close()
+        finally:
+            evict_task = server._evict_task
+            await server.stop()
+        return shot, guess, score, ended, gone, too_long, after, tcp_server.is_serving(), evict_task.cancelled()
+
+    shot, guess, score, ended, gone, too_long, after, serving, cancelled = asyncio.run(run())
+    assert shot['ok'] and 'result' in shot
+    assert guess['ok'] and 'correct' in guess
+    assert score['score'] == guess['score'] and ended['ok']
+    assert not gone['ok']
+    assert too_long == b'{"ok": false, "error": "message too long"}\n'
+    assert after == b''                                 # the server closed the connection
+    assert not serving and cancelled
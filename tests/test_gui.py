@@ -0,0 +1,86 @@
+# Description: Tests of BlackBoxGame screen updates and of the shared asset cache under the SDL dummy video driver.
+#               Skipped if pygame is not installed.
+
+import os
+import pytest
+
+pygame = pytest.importorskip('pygame')
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+from BlackBoxGUI import BlackBoxGame, clear_assets, get_base, get_font, render_text
+
+ATOMS = [(1, 6), (5, 2), (7, 2), (7, 6), (8, 7)]
+
+
+@pytest.fixture
+def pygame_started():
+    """Starts pygame, then shuts it down and empties the shared asset cache after the test."""
+
+    pygame.init()
+    yield
+    pygame.quit()
+    clear_assets()
+
+
+@pytest.fixture
+def display_updates(pygame_started, monkeypatch):
+    """Returns a list that gets one entry for each pygame.display.update call."""
+
+    calls = []
+    update = pygame.display.update
+    monkeypatch.setattr(pygame.display, 'update', lambda *args: calls.append(args) or update(*args))
+    return calls
+
+
+def test_idle_frames_do_not_update_the_display(display_updates):
+    game = BlackBoxGame(ATOMS)
+    game.shoot_ray(0, 1)
+    game.guess_atom(4, 4)
+    game.update_screen()
+    display_updates.clear()
+    for frame in range(0, 5):
+        game.update_screen()
+    assert display_updates == []
+
+
+def test_win_after_the_score_reached_zero(display_updates):
+    game = BlackBoxGame(ATOMS)
+    for row, column in [(2, 2), (2, 3), (2, 4), (2, 5), (3, 3)]:
+        game.guess_atom(row, column)                    # score down to zero
+    for row, column in ATOMS:
+        game.guess_atom(row, column)
+    assert game.get_score() <= 0 and game.get_game_result() == 'Win'
+
+    game.update_screen()
+    assert game._drawn_text[750].startswith('YOU WIN!')
+    display_updates.clear()
+    for frame in range(0, 5):
+        game.update_screen()
+    assert display_updates == []
+
+
+def test_games_share_assets(pygame_started):
+    first = BlackBoxGame(ATOMS)
+    second = BlackBoxGame()
+    assert second._font is first._font is get_font()
+    assert second._base is first._base is get_base()
+
+
+def test_rendered_text_is_cached(pygame_started):
+    BlackBoxGame(ATOMS)
+    surface = render_text('Score: 25')
+    assert render_text('Score: 25') is surface
+    assert render_text('Score: 25', (255, 0, 0)) is not surface
+    assert render_text('Score: 24') is not surface
+
+
+def test_clear_assets_loads_them_again(pygame_started):
+    game = BlackBoxGame(ATOMS)
+    font, base, surface = game._font, game._base, render_text('Score: 25')
+    pygame.quit()
+    clear_assets()
+    pygame.init()
+
+    game = BlackBoxGame(ATOMS)
+    assert game._font is not font and game._base is not base
+    assert render_text('Score: 25') is not surface
+    game.update_screen()                                # the new assets can be drawn with
@@ -0,0 +1,53 @@
+# Description: Tests of Instrumentation: turn counts of ray shots, the bounded table of the most expensive layouts,
+#               and instrumented games.
+
+import Instrumentation
+from Board import GameBoard
+from BlackBoxEngine import BlackBoxEngine
+from Instrumentation import Instrumentation as Stats, ShotRecord, trace_turns
+
+
+def test_trace_turns():
+    board = GameBoard([(1, 6), (5, 2), (7, 2), (7, 6), (8, 7)])
+    result, steps, detours, reflections = trace_turns(board, 0, 5)     # edge case reflection, the ray never moves
+    assert (result.status, steps, detours, reflections) == ('Reflection', 0, 0, 1)
+
+    board = GameBoard([(3, 3), (3, 5)])
+    assert trace_turns(board, 0, 4)[1:] == (4, 0, 1)                    # in two squares, reflected, out again
+    assert trace_turns(board, 4, 0)[1:] == (7, 1, 0)
+    assert trace_turns(GameBoard([(5, 5)]), 0, 4)[1:] == (8, 1, 0)
+
+
+def test_shot_histograms():
+    records = []
+    stats = Stats(on_shot=records.append)
+    board = GameBoard([(1, 6), (5, 2), (7, 2), (7, 6), (8, 7)])
+    assert stats.record_shot((), (0, 5), board) == board.trace_ray(0, 5)
+    stats.record_shot((), (0, 4), board)
+    summary = stats.get_summary()
+    assert summary['shots'] == 2
+    assert summary['reflections'] == {'0': 1, '1': 1}
+    assert records[0].status == 'Reflection' and records[0].reflections == 1
+
+
+def test_cheapest_layouts_are_dropped(monkeypatch):
+    monkeypatch.setattr(Instrumentation, 'MAX_LAYOUTS', 10)
+    stats = Stats()
+    for layout in range(0, 40):
+        stats.add_shot(ShotRecord(((layout, 1),), (0, 1), 'Hit', None, 1, 0, 0, (40 - layout) / 1000))
+    layouts = [entry['atoms'] for entry in stats.get_summary()['slowest_layouts']]
+    assert len(layouts) <= 10
+    assert layouts[:5] == [[[layout, 1]] for layout in range(0, 5)]
+
+
+def test_instrumented_game_traces_every_shot():
+    atoms = [(1, 6), (5, 2), (7, 2), (7, 6), (8, 7)]
+    stats = Stats()
+    game = BlackBoxEngine(atoms, instrumentation=stats)
+    plain = BlackBoxEngine(atoms)
+    for row, column in [(0, 1), (0, 1), (0, 5), (2, 2), (0, 0)]:
+        assert game.shoot_ray(row, column) == plain.shoot_ray(row, column)
+    assert game.get_score() == plain.get_score()
+    summary = stats.get_summary()
+    assert summary['shots'] == 3                        # a repeated shot is traced again, illegal squares are not
+    assert summary['entries']['0,1']['shots'] == 2
@@ -0,0 +1,67 @@
+# Description: Tests of PuzzleGenerator: without an index, puzzles have one solution, are rated within the asked range,
+#               and impossible requests and boards with too many layouts to check raise ValueError instead of running
+#               forever. With an index (needs numpy), the index holds every unique layout once per symmetry class.
+
+from collections import Counter
+from itertools import combinations
+import pytest
+from Board import GameBoard, interior_squares
+from BlackBoxEngine import random_atom_list
+from PuzzleGenerator import PuzzleGenerator, PuzzleIndex, canonical_layout, is_unique
+
+
+def test_puzzles_have_one_solution():
+    size, atom_count = 4, 3
+    signatures = Counter(GameBoard(layout, size).get_signature()
+                         for layout in combinations(interior_squares(size), atom_count))
+    puzzles = PuzzleGenerator(size=size, atom_count=atom_count, seed=2).generate(10, 5, 20)
+    for puzzle in puzzles:
+        assert signatures[puzzle.signature] == 1
+        assert 5 <= puzzle.difficulty <= 20
+    assert len(set(canonical_layout(puzzle.atoms, size) for puzzle in puzzles)) == len(puzzles)
+
+
+def test_too_few_layouts():
+    with pytest.raises(ValueError):
+        PuzzleGenerator(size=2, atom_count=4, seed=0).generate(2)
+
+
+def test_difficulty_out_of_reach():
+    with pytest.raises(ValueError):
+        PuzzleGenerator(seed=0).generate(1, min_difficulty=10000)
+    with pytest.raises(ValueError):
+        PuzzleGenerator(seed=0).generate(1, min_difficulty=10, max_difficulty=5)
+
+
+def test_too_many_layouts_to_check():
+    with pytest.raises(ValueError):
+        is_unique(random_atom_list(1, 16, 20), 16)
+    with pytest.raises(ValueError):
+        PuzzleGenerator(size=8, atom_count=8, seed=0)
+    assert is_unique(random_atom_list(1, 16, 2), 16) is True
+
+
+def test_index_matches_brute_force(tmp_path):
+    np = pytest.importorskip('numpy')
+    from BatchRays import simulate_layouts
+
+    layouts = list(combinations(interior_squares(), 3))
+    signatures = dict(zip(layouts, (codes.tobytes() for codes in simulate_layouts(np.array(layouts)))))
+    counts = Counter(signatures.values())
+    expected = {canonical_layout(layout) for layout, signature in signatures.items() if counts[signature] == 1}
+
+    index = PuzzleIndex.build(3)
+    assert len(index) == len(expected)
+    assert {canonical_layout(index.get_layout(position)) for position in range(0, len(index))} == expected
+
+    path = tmp_path / 'puzzles.npz'
+    index.save(path)
+    loaded = PuzzleIndex.load(path)
+    assert loaded.get_atom_count() == 3
+    assert [loaded.get_layout(position) for position in range(0, len(loaded))] == \
+        [index.get_layout(position) for position in range(0, len(index))]
+
+    generator = PuzzleGenerator(loaded, seed=0)
+    for puzzle in range(0, 50):
+        layout = generator.next_layout()
+        assert counts[signatures[tuple(layout)]] == 1
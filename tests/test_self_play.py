@@ -0,0 +1,19 @@
+# Description: Tests of SelfPlay: the report of a run only depends on its seeds, not on how the games are split
+#               between processes, and boards with too many layouts for the solver are refused.
+
+import pytest
+from SelfPlay import run
+
+
+def test_report_does_not_depend_on_workers_or_chunks():
+    for strategy, games in (('random', 40), ('solver', 6)):
+        single = run(strategy, games, seed=5, workers=1, chunk_size=games)
+        assert single['games'] == games
+        assert run(strategy, games, seed=5, workers=3, chunk_size=4) == single
+
+
+def test_solver_refuses_boards_with_too_many_layouts():
+    with pytest.raises(ValueError):
+        run('solver', 2, size=12, atom_count=10, workers=1)
+    with pytest.raises(ValueError):
+        run('solver', 2, size=12, atom_count=10, workers=2)
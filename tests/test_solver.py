@@ -0,0 +1,93 @@
+# Description: Tests of LayoutSolver against brute force: after each ray, the solver must keep exactly the layouts
+#               whose rays give the results seen so far.
+
+from itertools import combinations
+from random import Random
+import pytest
+from Board import GameBoard, ENTRY_SQUARES, entry_squares, interior_squares
+from BlackBoxEngine import random_atom_list
+from Solver import LayoutSolver
+
+
+def consistent_layouts(size, atom_count, rays):
+    """Returns the sorted list of layouts (sorted lists of atom squares) that give every (entry, exit) ray."""
+
+    layouts = []
+    for layout in combinations(interior_squares(size), atom_count):
+        board = GameBoard(layout, size)
+        if all(board.get_ray_result(row, column).exit == exit_square for (row, column), exit_square in rays):
+            layouts.append(list(layout))
+    return sorted(layouts)
+
+
+@pytest.mark.parametrize('size, atom_count', [(3, 2), (4, 3), (5, 3)])
+def test_matches_brute_force(size, atom_count):
+    rng = Random(size)
+    for game in range(0, 3):
+        atoms = random_atom_list(rng.getrandbits(32), size, atom_count)
+        table = GameBoard(atoms, size).get_ray_table()
+        entries = list(entry_squares(size))
+        rng.shuffle(entries)
+        solver = LayoutSolver(atom_count, size)
+        rays = []
+        for entry in entries[:6]:
+            rays.append((entry, table[entry].exit))
+            expected = consistent_layouts(size, atom_count, rays)
+            assert solver.add_ray(entry, table[entry].exit) == len(expected)
+            assert solver.count() == len(expected)
+            assert sorted(solver.get_layouts()) == expected
+
+        chances = solver.atom_chances()
+        for square in interior_squares(size):
+            share = sum(square in layout for layout in expected) / len(expected)
+            assert chances[square] == pytest.approx(share)
+
+
+def test_standard_board_keeps_the_layout():
+    for seed in range(0, 5):
+        atoms = random_atom_list(seed)
+        table = GameBoard(atoms).get_ray_table()
+        solver = LayoutSolver()
+        for entry in ENTRY_SQUARES:
+            solver.add_ray(entry, table[entry].exit)
+            assert solver.count() > 1000 or sorted(atoms) in solver.get_layouts()
+        assert sorted(atoms) in solver.get_layouts()
+
+
+def test_best_ray_is_unused():
+    atoms = random_atom_list(3)
+    table = GameBoard(atoms).get_ray_table()
+    solver = LayoutSolver()
+    used = set()
+    for turn in range(0, 2):
+        entry = solver.best_ray()
+        if entry is None:
+            break
+        assert entry in ENTRY_SQUARES and entry not in used
+        used.update((entry, table[entry].exit))
+        solver.add_ray(entry, table[entry].exit)
+
+
+def test_best_ray_repeats_and_tells_layouts_apart():
+    atoms = random_atom_list(5)
+    table = GameBoard(atoms).get_ray_table()
+    solver = LayoutSolver()
+    assert solver.best_ray() == (0, 4)                  # the standard opening ray is not worked out again
+    for entry in ((0, 4), (9, 2), (3, 0)):
+        solver.add_ray(entry, table[entry].exit)
+    assert solver.best_ray() == solver.best_ray()
+
+    while not solver.is_solved():
+        entry = solver.best_ray()
+        if entry is None:
+            break
+        results = {GameBoard(layout).get_ray_result(entry[0], entry[1]).exit for layout in solver.get_layouts()}
+        assert solver.count() > 128 or len(results) > 1  # with few layouts left, the ray splits them
+        solver.add_ray(entry, table[entry].exit)
+    assert sorted(atoms) in solver.get_layouts()
+
+
+def test_too_many_layouts():
+    with pytest.raises(ValueError):
+        LayoutSolver(10, 12)
+    LayoutSolver(7, 8)                                  # 621 million layouts, within MAX_LAYOUTS